@@ -94,30 +94,27 @@ class MCPBridgeServer:
         action = request.get("action")
         params = request.get("params", {})
 
-        import queue
-
-        result_queue = queue.Queue()
+        done = threading.Event()
+        box = [None]
 
         def do_action():
             try:
                 from . import tool_definitions
-                result = tool_definitions.execute_tool(action, params)
-                result_queue.put(result)
+                box[0] = tool_definitions.execute_tool(action, params)
             except Exception as e:
-                result_queue.put({"success": False, "error": str(e)})
+                box[0] = {"success": False, "error": str(e)}
+            done.set()
             return None
 
         bpy.app.timers.register(do_action)
 
-        try:
-            result = result_queue.get(timeout=30.0)
-            if result.get("success"):
-                return {"success": True, "data": result.get("result")}
-            else:
-                return {"success": False, "error": result.get("error")}
-        except Exception:
+        if not done.wait(30.0):
             return {"success": False, "error": "操作超时"}
-
+        result = box[0]
+        if result.get("success"):
+            return {"success": True, "data": result.get("result")}
+        else:
+            return {"success": False, "error": result.get("error")}
 
 _mcp_server = None
 
@@ -207,12 +204,24 @@ def register():
     except Exception as e:
         print(f"[Blender Agent] Chat UI 注册失败: {e}")
 
+    try:
+        from . import animation_tools
+        animation_tools.register()
+    except Exception as e:
+        print(f"[Blender Agent] 动画工具注册失败: {e}")
+
 
 def unregister():
     global _mcp_server
     if _mcp_server:
         _mcp_server.stop()
 
+    try:
+        from . import animation_tools
+        animation_tools.unregister()
+    except Exception as e:
+        print(f"[Blender Agent] 动画工具注销失败: {e}")
+
     try:
         from . import chat_ui
         chat_ui.unregister()
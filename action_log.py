@@ -8,15 +8,37 @@ Action Log - Agent 操作日志系统
 import json
 import os
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 _LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
 _METRICS_FILE = os.path.join(_LOG_DIR, "metrics.jsonl")
 _current_session = None
+_log_dir_ready = False
 
 
 def _ensure_log_dir():
-    os.makedirs(_LOG_DIR, exist_ok=True)
+    # 目录创建成功后不再每次 makedirs（省一次 stat）
+    global _log_dir_ready
+    if not _log_dir_ready:
+        os.makedirs(_LOG_DIR, exist_ok=True)
+        _log_dir_ready = True
+
+
+def _open_log_file(path: str, mode: str):
+    """打开日志目录下的文件写入；目录在运行中被删除时重置标记、重建后重试一次"""
+    global _log_dir_ready
+    _ensure_log_dir()
+    try:
+        return open(path, mode, encoding="utf-8")
+    except FileNotFoundError:
+        _log_dir_ready = False
+        _ensure_log_dir()
+        return open(path, mode, encoding="utf-8")
+
+
+def get_log_dir() -> str:
+    _ensure_log_dir()
+    return _LOG_DIR
 
 
 def start_session(user_message: str) -> str:
@@ -233,12 +255,11 @@ def end_session(final_result: str = ""):
         _current_session["performance_summary"]
     )
 
-    _ensure_log_dir()
     filename = f"session_{_current_session['session_id']}.json"
     filepath = os.path.join(_LOG_DIR, filename)
 
     try:
-        with open(filepath, "w", encoding="utf-8") as f:
+        with _open_log_file(filepath, "w") as f:
             json.dump(_current_session, f, ensure_ascii=False, indent=2)
     except Exception as e:
         print(f"[ActionLog] 保存日志失败: {e}")
@@ -257,21 +278,32 @@ def end_session(final_result: str = ""):
     return filepath
 
 
-def get_recent_logs(count: int = 10) -> list:
+def iter_recent_logs(count: int = 10) -> Iterator[dict]:
+    """逐个读取并产出最近的会话日志（最新优先），不一次性载入全部"""
+    global _log_dir_ready
     _ensure_log_dir()
+    try:
+        names = os.listdir(_LOG_DIR)
+    except FileNotFoundError:
+        # 目录在运行中被删除：下次写入时重建
+        _log_dir_ready = False
+        return
     files = sorted(
-        [f for f in os.listdir(_LOG_DIR) if f.startswith("session_") and f.endswith(".json")],
+        [f for f in names if f.startswith("session_") and f.endswith(".json")],
         reverse=True
     )[:count]
 
-    logs = []
     for f in files:
         try:
             with open(os.path.join(_LOG_DIR, f), "r", encoding="utf-8") as fh:
-                logs.append(json.load(fh))
+                log = json.load(fh)
         except Exception:
-            pass
-    return logs
+            continue
+        yield log
+
+
+def get_recent_logs(count: int = 10) -> list:
+    return list(iter_recent_logs(count))
 
 
 def get_session_log(session_id: str) -> Optional[dict]:
@@ -330,8 +362,7 @@ def _summarize_result(result: dict) -> str:
 def _append_metrics_line(obj: dict):
     """写入 JSONL 指标流；失败不影响主流程"""
     try:
-        _ensure_log_dir()
-        with open(_METRICS_FILE, "a", encoding="utf-8") as f:
+        with _open_log_file(_METRICS_FILE, "a") as f:
             f.write(json.dumps(_safe_serialize(obj), ensure_ascii=False) + "\n")
     except Exception:
         pass
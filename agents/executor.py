@@ -20,10 +20,81 @@ from ..core.safety_guard import looks_like_python_script, looks_like_script_outp
 from .shader_read_agent import ShaderReadAgent
 
 
+# 执行阶段等待进行中的 shader 预热的上限（秒），超时则内联构建
+_SHADER_PREWARM_WAIT = 10.0
+
+# 工具循环的历史窗口：轮次超过上限时把较早的轮次折叠为汇总（并入初始用户消息），
+# 只保留最近若干轮完整的工具交互
+_KEEP_RECENT_ROUNDS = 2
+# 汇总中每次工具调用保留的结果预览长度
+_SUMMARY_PREVIEW_CHARS = 160
+
+# 纯问答类意图：模型直接文字回答即为最终结果，不做纠偏重试
+_ANSWER_INTENTS = frozenset({"query", "chat", "explain"})
+
+
 def _log(msg: str):
     print(f"[Executor] {msg}")
 
 
+def _append_text(content, text: str):
+    """向消息 content（字符串或内容块列表）末尾追加一段文本"""
+    if isinstance(content, list):
+        return content + [{"type": "text", "text": text}]
+    return f"{content}\n\n{text}" if content else text
+
+
+def _compact_history(messages: list, head: list, rounds: list, all_results: list) -> list:
+    """
+    原地折叠 messages 中较早的工具轮次
+
+    head: 循环开始时的初始消息（未修改的原件）；汇总并入其中最后一条用户消息，
+    保持 user / assistant 交替。rounds: 每轮开始时的 (消息下标, all_results 下标)。
+    只在轮次边界切分，保证 tool_use / tool_result 成对保留。返回更新后的 rounds。
+    """
+    if len(rounds) <= _KEEP_RECENT_ROUNDS or not head or head[-1].get("role") != "user":
+        return rounds
+    cut_msg, cut_result = rounds[-_KEEP_RECENT_ROUNDS]
+    if cut_msg <= len(head):
+        return rounds
+
+    collapsed = all_results[:cut_result]
+    failed = sum(1 for r in collapsed if not r["result"].get("success"))
+    lines = [f"[前序工具结果已汇总: {len(collapsed)} 次调用，"
+             + (f"{failed} 次失败]" if failed else "全部 success]")]
+    for r in collapsed:
+        preview = summarize_tool_result(r["tool"], r["result"], max_chars=_SUMMARY_PREVIEW_CHARS)
+        lines.append(f"- {r['tool']}: {preview}")
+
+    last = head[-1]
+    messages[:cut_msg] = head[:-1] + [dict(last, content=_append_text(last.get("content"), "\n".join(lines)))]
+    shift = cut_msg - len(head)
+    _log(f"Compacted loop history: dropped {shift} messages, msgs={len(messages)}")
+    return [(m - shift, r) for m, r in rounds[-_KEEP_RECENT_ROUNDS:]]
+
+
+def _is_final_text_reply(text: str, intent: str, complexity: str, has_tool_results: bool) -> bool:
+    """无工具调用的文字回复是否可直接作为最终回答（省去一轮纠偏）
+
+    操作类意图必须在本轮已执行过工具，否则“我现在就去添加立方体……”之类的
+    口头承诺会直接结束循环而什么都没做。
+    """
+    if not text:
+        return False
+    if intent in _ANSWER_INTENTS:
+        return True
+    if complexity == "complex":
+        # 计划步骤必须落到工具调用上
+        return False
+    if not has_tool_results:
+        return False
+    return (
+        len(text) > 20
+        and not looks_like_python_script(text)
+        and not looks_like_script_output(text)
+    )
+
+
 class ExecutorAgent:
 
     def __init__(self, llm: LLMProvider, execute_in_main_thread=None):
@@ -32,6 +103,21 @@ class ExecutorAgent:
         self._shader_reader = ShaderReadAgent(self._run_tool)
         self._shader_prewarm = None
         self._shader_prewarm_lock = threading.Lock()
+        self._shader_prewarm_done = threading.Event()
+        self._shader_prewarm_done.set()
+        # 预编码的工具 schema（按意图缓存，跨轮次/跨步骤复用）
+        self._schema_json_cache: dict[str, bytes] = {}
+
+    def start_shader_prewarm(self, user_message: str) -> threading.Thread:
+        """在后台线程启动 shader 预热；执行阶段会等待其完成而不是重复构建"""
+        self._shader_prewarm_done.clear()
+        thread = threading.Thread(
+            target=self.prewarm_shader_context,
+            args=(user_message,),
+            daemon=True,
+        )
+        thread.start()
+        return thread
 
     def prewarm_shader_context(self, user_message: str):
         """后台预热 shader 读取上下文，供后续执行阶段复用"""
@@ -53,8 +139,22 @@ class ExecutorAgent:
                 "error": str(e),
             })
             _log(f"shader prewarm failed: {e}")
+        finally:
+            self._shader_prewarm_done.set()
 
-    def _consume_shader_prewarm_context(self):
+    def _encoded_tools(self, cache_key: str, tool_schemas: list) -> bytes | None:
+        if not tool_schemas:
+            return None
+        payload = self._schema_json_cache.get(cache_key)
+        if payload is None:
+            payload = self._llm.encode_tools(tool_schemas)
+            self._schema_json_cache[cache_key] = payload
+        return payload
+
+    def _consume_shader_prewarm_context(self, wait: float = 0.0):
+        if wait and not self._shader_prewarm_done.is_set():
+            _log(f"waiting for in-flight shader prewarm (<= {wait}s)")
+            self._shader_prewarm_done.wait(wait)
         with self._shader_prewarm_lock:
             ctx = self._shader_prewarm
             self._shader_prewarm = None
@@ -74,10 +174,13 @@ class ExecutorAgent:
         _log(f"execute_with_llm: step={step.step}, desc={step.description[:60] if step.description else 'N/A'}")
         return self._execute_with_llm(step, domain, prev_summary, user_message)
 
-    def execute_simple(self, user_message: str, domain: str, intent: str) -> dict:
+    def execute_simple(
+        self, user_message: str, domain: str, intent: str, complexity: str = "simple",
+    ) -> dict:
         registry = get_registry()
         tools = registry.get_for_intent(intent)
         tool_schemas = registry.get_schemas(tools)
+        schema_key = intent
         _log(f"execute_simple: domain={domain}, intent={intent}, tools_count={len(tools)}, registry_total={registry.count}")
 
         system = AgentPrompts.get_executor_prompt(domain)
@@ -85,7 +188,7 @@ class ExecutorAgent:
         preflight = "[系统提醒] 你是 Blender 操作者，必须使用提供的工具执行操作。禁止纯文字回复，立即调用工具。\n\n"
         messages = [{"role": "user", "content": preflight + user_message}]
         if domain == "shader":
-            shader_ctx = self._consume_shader_prewarm_context()
+            shader_ctx = self._consume_shader_prewarm_context(wait=_SHADER_PREWARM_WAIT)
             ctx_source = "prewarm_cache"
             if not shader_ctx:
                 shader_ctx = self._shader_reader.build_context(user_message)
@@ -104,16 +207,22 @@ class ExecutorAgent:
             _log(f"WARNING: intent '{intent}' returned 0 tools, falling back to ALL {registry.count} tools")
             tools = registry.get_all()
             tool_schemas = registry.get_schemas(tools)
+            schema_key = "__all__"
         
         if not tool_schemas:
             _log("CRITICAL: Registry empty! Trying direct import fallback...")
             try:
                 from .. import tool_definitions
                 tool_schemas = tool_definitions.TOOLS  # 直接用原始 TOOLS 列表（已是 Anthropic 格式）
+                schema_key = "__tool_definitions__"
                 _log(f"Direct import fallback: {len(tool_schemas)} tools loaded")
             except Exception as e:
                 _log(f"Direct import also failed: {e}")
-        return self._llm_tool_loop(messages, system, tool_schemas, max_rounds=5)
+        return self._llm_tool_loop(
+            messages, system, tool_schemas, max_rounds=5,
+            tools_payload=self._encoded_tools(schema_key, tool_schemas),
+            intent=intent, complexity=complexity,
+        )
 
     def _execute_direct(self, step: PlanStep) -> dict:
         result = self._run_tool(step.tool, step.params)
@@ -143,7 +252,7 @@ class ExecutorAgent:
             step.description, step.params, prev_summary, user_message,
         )
         if domain == "shader":
-            shader_ctx = self._consume_shader_prewarm_context()
+            shader_ctx = self._consume_shader_prewarm_context(wait=_SHADER_PREWARM_WAIT)
             ctx_source = "prewarm_cache"
             shader_hint_input = f"{user_message}\n{step.description or ''}"
             if not shader_ctx:
@@ -158,7 +267,11 @@ class ExecutorAgent:
             })
             _log(f"shader step pre-context metrics({ctx_source}): {shader_ctx.get('metrics', {})}")
 
-        result = self._llm_tool_loop(messages, system, tool_schemas, max_rounds=3)
+        result = self._llm_tool_loop(
+            messages, system, tool_schemas, max_rounds=3,
+            tools_payload=self._encoded_tools(intent, tool_schemas),
+            intent=intent, complexity="complex",
+        )
         step.status = "success" if result.get("success") else "failed"
         step.result = result
         return result
@@ -169,15 +282,21 @@ class ExecutorAgent:
         system: str,
         tool_schemas: list,
         max_rounds: int = 5,
+        tools_payload: bytes | None = None,
+        intent: str = "",
+        complexity: str = "",
     ) -> dict:
         all_results = []
         final_text = ""
+        head = list(messages)
+        rounds = []
 
         for round_i in range(max_rounds):
             _log(f"LLM call round {round_i + 1}/{max_rounds}, msgs={len(messages)}, tools={len(tool_schemas)}")
             try:
                 response = self._llm.chat(
                     messages=messages, system=system, tools=tool_schemas if tool_schemas else None,
+                    tools_payload=tools_payload,
                 )
             except Exception as e:
                 _log(f"LLM call failed: {type(e).__name__}: {e}")
@@ -194,6 +313,9 @@ class ExecutorAgent:
                 final_text = response.text
 
             if not response.has_tool_calls:
+                if _is_final_text_reply(response.text, intent, complexity, bool(all_results)):
+                    _log(f"Text-only reply accepted as final (intent={intent}, complexity={complexity})")
+                    break
                 if round_i < (max_rounds - 1):
                     if response.text and (looks_like_python_script(response.text) or looks_like_script_output(response.text)):
                         _log("Detected script-like output without tools, forcing corrective retry")
@@ -210,6 +332,7 @@ class ExecutorAgent:
                     continue
                 break
 
+            rounds.append((len(messages), len(all_results)))
             assistant_msg = self._llm.format_assistant_with_tool_calls(response)
             messages.append(assistant_msg)
 
@@ -234,6 +357,8 @@ class ExecutorAgent:
                 tool_result_msgs.append(tool_msg)
 
             messages.extend(self._llm.format_tool_results_as_messages(tool_result_msgs))
+            if round_i < max_rounds - 1:
+                rounds = _compact_history(messages, head, rounds, all_results)
 
         last_success = all(r["result"].get("success", False) for r in all_results) if all_results else True
         return {
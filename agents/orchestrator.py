@@ -101,7 +101,7 @@ class AgentOrchestrator:
     def _process_simple(self, user_message: str, route):
         _log(f"execute_simple: domain={route.domain}, intent={route.intent}")
         result = self._executor.execute_simple(
-            user_message, route.domain, route.intent,
+            user_message, route.domain, route.intent, route.complexity,
         )
         _log(f"execute_simple done: success={result.get('success')}, result_len={len(str(result.get('result', '')))}")
 
@@ -111,24 +111,15 @@ class AgentOrchestrator:
         self._end_session(result.get("result", ""))
 
     def _process_complex(self, user_message: str, route):
-        prewarm_thread = None
         if route.domain == "shader":
+            # 预热与规划并行；不在此处 join，首个 shader 步骤按需等待预热结果
             _log("Starting shader prewarm in parallel with planning")
-            prewarm_thread = threading.Thread(
-                target=self._executor.prewarm_shader_context,
-                args=(user_message,),
-                daemon=True,
-            )
-            prewarm_thread.start()
+            self._executor.start_shader_prewarm(user_message)
 
         _log(f"Planning: intent={route.intent}")
         plan = self._planner.plan(user_message, route.intent)
         _log(f"Plan result: {plan.total_steps} steps, summary={plan.summary[:80] if plan.summary else 'N/A'}")
 
-        if prewarm_thread:
-            prewarm_thread.join(timeout=2.0)
-            _log("Shader prewarm join complete (timeout=2s)")
-
         if not plan.steps:
             _log("Empty plan, falling back to simple")
             self._emit_message("assistant", "无法分解任务，尝试直接执行...")
@@ -2,30 +2,73 @@
 Router Agent - 意图分类
 
 默认使用规则引擎（零 LLM 调用），可选 LLM 增强。
+规则路由按消息缓存；LLM 路由按归一化消息做语义缓存（TTL 5 分钟）。
 """
 
+import dataclasses
+import functools
+import hashlib
+import re
+import time
+
 from ..parsers.route_parser import RouteDecision, parse_route, parse_route_from_llm
 from ..llm.base import LLMProvider, LLMConfig
 from ..context.prompts import AgentPrompts
 
 
+# 规则引擎是纯函数，重复/重试的消息直接命中缓存
+_parse_route_lru = functools.lru_cache(maxsize=256)(parse_route)
+
+
+def _cached_parse_route(user_message: str) -> RouteDecision:
+    # 缓存中的实例由所有调用方共享，返回副本，避免下游修改泄漏到后续请求
+    return dataclasses.replace(_parse_route_lru(user_message))
+
+_LLM_ROUTE_TTL = 300.0
+_LLM_ROUTE_CACHE_MAX = 256
+_PUNCT_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def _normalize_message(user_message: str) -> str:
+    """小写 + 去标点/空白，近似消息映射到同一 key"""
+    normalized = _PUNCT_RE.sub("", (user_message or "").lower())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
 class RouterAgent:
 
     def __init__(self, llm: LLMProvider = None, use_llm: bool = False):
         self._llm = llm
         self._use_llm = use_llm and llm is not None
+        self._llm_route_cache: dict[str, tuple[float, RouteDecision]] = {}
 
     def route(self, user_message: str) -> RouteDecision:
         if self._use_llm:
             return self._route_with_llm(user_message)
-        return parse_route(user_message)
+        return _cached_parse_route(user_message)
 
     def _route_with_llm(self, user_message: str) -> RouteDecision:
+        key = _normalize_message(user_message)
+        now = time.time()
+        hit = self._llm_route_cache.get(key)
+        if hit and now - hit[0] < _LLM_ROUTE_TTL:
+            return dataclasses.replace(hit[1])
+
         try:
             response = self._llm.chat(
                 messages=[{"role": "user", "content": user_message}],
                 system=AgentPrompts.ROUTER,
             )
-            return parse_route_from_llm(response.text)
+            decision = parse_route_from_llm(response.text)
         except Exception:
-            return parse_route(user_message)
+            return _cached_parse_route(user_message)
+
+        if len(self._llm_route_cache) >= _LLM_ROUTE_CACHE_MAX:
+            self._llm_route_cache = {
+                k: v for k, v in self._llm_route_cache.items()
+                if now - v[0] < _LLM_ROUTE_TTL
+            }
+            if len(self._llm_route_cache) >= _LLM_ROUTE_CACHE_MAX:
+                self._llm_route_cache.pop(next(iter(self._llm_route_cache)))
+        self._llm_route_cache[key] = (now, decision)
+        return dataclasses.replace(decision)
@@ -5,6 +5,7 @@ Validator Agent - 结果验证
 """
 
 import json
+import re
 from dataclasses import dataclass, field
 from ..llm.base import LLMProvider
 from ..context.prompts import AgentPrompts
@@ -17,6 +18,9 @@ class ValidationResult:
     suggestion: str = ""
 
 
+_VALIDATION_RE = re.compile(r'\{[^{}]*"passed"[^{}]*\}', re.DOTALL)
+
+
 class ValidatorAgent:
 
     def __init__(self, llm: LLMProvider = None):
@@ -69,8 +73,7 @@ class ValidatorAgent:
     @staticmethod
     def _parse_validation(text: str) -> ValidationResult:
         try:
-            import re
-            match = re.search(r'\{[^{}]*"passed"[^{}]*\}', text, re.DOTALL)
+            match = _VALIDATION_RE.search(text)
             if match:
                 data = json.loads(match.group())
                 return ValidationResult(
@@ -6,138 +6,360 @@ Animation Tools - UV/节点动画工具
 """
 
 import bpy
+import hashlib
 import math
+import types
+import numpy as np
 from typing import Optional
 from .shader_tools import _result, _get_material, _get_node
+from .core.driver_expressions import (
+    parse_linear_expression, expand_driver_template, uses_default_driver_names,
+    check_vectorized_expression,
+)
+
+
+_RAD_TO_DEG = 57.29577951308232
+_AXIS_IDX = {'X': 0, 'Y': 1, 'Z': 2}
+
+# 表达式 → 编译后的 code object（每个唯一表达式只解析一次）
+_DRIVER_CACHE: dict[str, types.CodeType] = {}
+# 已写入 driver_namespace 的函数名，注销时移除
+_DRIVER_NAMES: set[str] = set()
+# 材质上记录已注册的表达式，文件重新加载后据此恢复 driver_namespace
+_DRIVER_EXPR_PROP = "_gohot_driver_exprs"
+
+
+# 烘焙表达式用的向量化命名空间：frame 为整段帧号数组，一次 ufunc 求出全部值
+_BAKE_GLOBALS = {
+    "__builtins__": {},
+    "pi": math.pi, "e": math.e, "tau": math.tau,
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan, "atan2": np.arctan2,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "sqrt": np.sqrt, "exp": np.exp, "log": np.log, "log10": np.log10,
+    "pow": np.power, "abs": np.abs, "fabs": np.abs, "fmod": np.fmod,
+    "floor": np.floor, "ceil": np.ceil, "trunc": np.trunc, "round": np.round,
+    "min": np.minimum, "max": np.maximum, "clamp": np.clip,
+    "radians": np.radians, "degrees": np.degrees,
+}
+# 烘焙表达式可引用的名字
+_BAKE_NAMES = frozenset(_BAKE_GLOBALS.keys() - {"__builtins__"} | {"frame"})
+
+
+def _register_driver_expression(expression: str) -> str:
+    """编译表达式并注册到 driver_namespace，返回函数名"""
+    code = _DRIVER_CACHE.get(expression)
+    if code is None:
+        code = compile(expression, "<driver>", "eval")
+        _DRIVER_CACHE[expression] = code
+    name = "_drv_" + hashlib.blake2b(expression.encode("utf-8"), digest_size=6).hexdigest()
+    # 以 driver_namespace 本身为全局命名空间：与普通 Driver 一样可用 bpy、noise、
+    # math 函数、内置函数及用户自行注册的名字
+    namespace = bpy.app.driver_namespace
+    namespace[name] = (
+        lambda frame, _c=code, _ns=namespace: eval(_c, _ns, {"frame": frame})
+    )
+    _DRIVER_NAMES.add(name)
+    return name
+
+
+@bpy.app.handlers.persistent
+def _restore_driver_expressions(*_args):
+    for mat in bpy.data.materials:
+        exprs = mat.get(_DRIVER_EXPR_PROP)
+        if exprs:
+            for expression in exprs.values():
+                try:
+                    _register_driver_expression(expression)
+                except SyntaxError:
+                    pass
+    return None
+
+
+def _setup_linear_driver(fcurve, base: float, speed: float):
+    """线性 base + speed·frame 驱动：SUM 读取场景帧号，系数放进 Generator 修改器
+
+    全程由 Blender 原生求值，不走逐帧 Python 表达式解释。
+    """
+    driver = fcurve.driver
+    driver.type = 'SUM'
+    for var in list(driver.variables):
+        driver.variables.remove(var)
+    var = driver.variables.new()
+    var.name = "frame"
+    var.type = 'SINGLE_PROP'
+    target = var.targets[0]
+    target.id_type = 'SCENE'
+    target.id = bpy.context.scene
+    target.data_path = "frame_current"
+
+    # driver_add 默认会带一个 Generator 修改器，直接复用
+    _set_linear_generator(fcurve, base, speed)
+
+
+def _set_linear_generator(fcurve, base: float, speed: float):
+    """在 F-Curve 上设置一次多项式 Generator：y = base + speed·x"""
+    mod = next((m for m in fcurve.modifiers if m.type == 'GENERATOR'), None)
+    if mod is None:
+        mod = fcurve.modifiers.new('GENERATOR')
+    mod.mode = 'POLYNOMIAL'
+    mod.poly_order = 1
+    mod.use_additive = False
+    mod.coefficients = (base, speed)
+
+
+def _add_linear_fcurve(socket, index: int, base: float, speed: float):
+    """不用驱动：在 Action 中创建无关键帧的 F-Curve，仅挂 Generator 修改器
+
+    Generator 直接以场景时间为自变量，纯 C 求值，也不产生驱动依赖。
+    若该分量已有用户关键帧则返回 None，由调用方回退到驱动方案。
+    """
+    data_path = socket.path_from_id("default_value")
+    fcurve = _find_fcurve(socket.id_data, data_path, index)
+    if fcurve is not None and len(fcurve.keyframe_points):
+        return None
+
+    # 驱动会覆盖 F-Curve 的结果，先移除同分量上的旧驱动
+    socket.driver_remove("default_value", index)
+    if fcurve is None:
+        socket.keyframe_insert("default_value", index=index, frame=0)
+        fcurve = _find_fcurve(socket.id_data, data_path, index)
+        if fcurve is None:
+            return None
+        points = fcurve.keyframe_points
+        while len(points):
+            points.remove(points[0], fast=True)
+
+    _set_linear_generator(fcurve, base, speed)
+    return fcurve
+
+
+def _clear_linear_fcurves(socket, index: int = -1) -> int:
+    """移除 _add_linear_fcurve 创建的 Generator（无关键帧的 F-Curve）"""
+    data_path = socket.path_from_id("default_value")
+    count = len(socket.default_value) if hasattr(socket.default_value, "__len__") else 1
+    indices = [index] if index >= 0 else range(count)
+    removed = 0
+    for i in indices:
+        fcurve = _find_fcurve(socket.id_data, data_path, i)
+        if fcurve is None or len(fcurve.keyframe_points):
+            continue
+        for mod in [m for m in fcurve.modifiers if m.type == 'GENERATOR']:
+            fcurve.modifiers.remove(mod)
+            removed += 1
+    return removed
+
+
+def _resolve(material_name: str, node_name: str):
+    """解析 (材质, 节点)
+
+    每次调用都按名重新查找：Node 不是 ID，被删除后其 Python 对象不会失效，
+    跨调用持有节点引用可能读到已释放的内存。
+    """
+    mat = _get_material(material_name)
+    return mat, _get_node(mat, node_name)
 
 
-def anim_add_uv_scroll(material_name: str, node_name: str,
-                       speed_x: float = 0.0, speed_y: float = 0.0, speed_z: float = 0.0) -> dict:
-    """为 Mapping 节点的 Location 添加基于帧的 Driver，实现 UV 滚动动画"""
-    try:
-        mat = _get_material(material_name)
-        node = _get_node(mat, node_name)
-
-        if node.type != 'MAPPING':
-            return _result(False, None, f"{node_name} 不是 Mapping 节点")
-
-        speeds = [speed_x, speed_y, speed_z]
-        axes = ['X', 'Y', 'Z']
-        added = []
-
-        for i, (speed, axis) in enumerate(zip(speeds, axes)):
-            if speed == 0.0:
-                continue
-
-            loc_input = node.inputs.get('Location')
-            if loc_input is None:
-                return _result(False, None, "Mapping 节点没有 Location 输入")
-
-            fcurve = loc_input.driver_add("default_value", i)
-            driver = fcurve.driver
-            driver.type = 'SCRIPTED'
-            driver.expression = f"frame * {speed}"
-
-            added.append(f"{axis}={speed}/帧")
+def _driver_fcurves(socket, indices) -> dict:
+    """为 socket 的指定分量创建驱动；全部分量都需要时一次 driver_add 返回所有 F-Curve
 
-        if not added:
-            return _result(False, None, "至少需要一个轴的速度不为0")
+    未动画的分量不创建驱动，以免覆盖其当前值。
+    """
+    if len(indices) == len(socket.default_value):
+        return dict(enumerate(socket.driver_add("default_value")))
+    return {i: socket.driver_add("default_value", i) for i in indices}
+
+
+def _find_fcurve(id_data, data_path: str, index: int = 0):
+    """在 id_data 的当前 Action 中查找 F-Curve（兼容 4.4+ 分层 Action）"""
+    anim = id_data.animation_data
+    action = anim.action if anim else None
+    if action is None:
+        return None
+    fcurves = getattr(action, "fcurves", None)
+    if fcurves is not None:
+        return fcurves.find(data_path, index=index)
+    for layer in action.layers:
+        for strip in layer.strips:
+            bag = strip.channelbag(anim.action_slot)
+            if bag is not None:
+                fc = bag.fcurves.find(data_path, index=index)
+                if fc is not None:
+                    return fc
+    return None
+
+
+def _interpolation_value(interpolation: str) -> int:
+    """关键帧插值枚举名 → RNA 整数值（供 foreach_set 使用）"""
+    items = bpy.types.Keyframe.bl_rna.properties["interpolation"].enum_items
+    return items[interpolation.upper()].value
+
+
+def _write_keyframes(fcurve, frames, values, interpolation: str = ""):
+    """一次性写入多帧关键帧：add + foreach_set，替代逐帧 keyframe_insert
+
+    已有的帧原地改值（左右句柄同量平移），句柄类型、缓动、关键帧类型等保持不变；
+    只为新帧追加关键点。interpolation 仅作用于新关键帧，为空时使用 Blender 默认插值。
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    # 同一帧给了多次值时以最后一次为准
+    frames, last = np.unique(frames[::-1], return_index=True)
+    values = values[::-1][last]
+
+    points = fcurve.keyframe_points
+    old_count = len(points)
+    co = np.empty(old_count * 2, dtype=np.float32)
+    if old_count:
+        points.foreach_get("co", co)
+    co = co.reshape(-1, 2)
+
+    slot = {f: i for i, f in enumerate(co[:, 0].tolist())}
+    hit = np.fromiter((slot.get(f, -1) for f in frames.tolist()), dtype=np.int64, count=len(frames))
+    existing = hit >= 0
+    if existing.any():
+        idx = hit[existing]
+        delta = values[existing] - co[idx, 1]
+        co[idx, 1] = values[existing]
+        points.foreach_set("co", co.ravel())
+        for attr in ("handle_left", "handle_right"):
+            handles = np.empty(old_count * 2, dtype=np.float32)
+            points.foreach_get(attr, handles)
+            handles = handles.reshape(-1, 2)
+            handles[idx, 1] += delta
+            points.foreach_set(attr, handles.ravel())
+
+    fresh = ~existing
+    added = int(fresh.sum())
+    if added:
+        points.add(added)
+        tail = np.column_stack((frames[fresh], values[fresh]))
+        points.foreach_set("co", np.concatenate((co, tail)).ravel())
+        if interpolation:
+            ipo = np.empty(old_count + added, dtype=np.int32)
+            points.foreach_get("interpolation", ipo)
+            ipo[old_count:] = _interpolation_value(interpolation)
+            points.foreach_set("interpolation", ipo)
+
+    # update() 负责排序并重算自动句柄
+    fcurve.update()
+    return len(points)
 
-        tips = (
-            f"已为 {node_name} 添加UV滚动: {', '.join(added)}\n\n"
-            "调整提示:\n"
-            f"- 在节点编辑器中选择 {node_name}，Location 输入会显示紫色(有Driver)\n"
-            "- 修改速度: 在 Driver 编辑器中修改 expression 的系数\n"
-            "- 删除动画: 使用 anim_remove_driver 工具"
-        )
-        return _result(True, tips)
 
-    except Exception as e:
-        return _result(False, None, str(e))
+def anim_add_uv_scroll(material_name: str, node_name: str,
+                       speed_x: float = 0.0, speed_y: float = 0.0, speed_z: float = 0.0,
+                       verbose: bool = True) -> dict:
+    """为 Mapping 节点的 Location 添加基于帧的 Driver，实现 UV 滚动动画"""
+    mat, node = _resolve(material_name, node_name)
+
+    if not isinstance(node, bpy.types.ShaderNodeMapping):
+        raise ValueError(f"{node_name} 不是 Mapping 节点")
+
+    loc_input = node.inputs.get('Location')
+    if loc_input is None:
+        raise ValueError("Mapping 节点没有 Location 输入")
+
+    speeds = (speed_x, speed_y, speed_z)
+    active = [(i, speeds[i], "XYZ"[i]) for i in range(3) if speeds[i] != 0.0]
+    if not active:
+        raise ValueError("至少需要一个轴的速度不为0")
+
+    # 优先无驱动的 Generator F-Curve；已有关键帧的分量回退到驱动
+    fallback = [i for i, speed, _ in active if _add_linear_fcurve(loc_input, i, 0.0, speed) is None]
+    fcurves = _driver_fcurves(loc_input, fallback) if fallback else {}
+
+    added = []
+    for i, speed, axis in active:
+        if i in fcurves:
+            _setup_linear_driver(fcurves[i], 0.0, speed)
+        added.append(f"{axis}={speed}/帧")
+
+    summary = f"已为 {node_name} 添加UV滚动: {', '.join(added)}"
+    if not verbose:
+        return _result(True, summary)
+    tips = (
+        f"{summary}\n\n"
+        "调整提示:\n"
+        f"- 在节点编辑器中选择 {node_name}，Location 输入会显示为已动画\n"
+        "- 修改速度: 在曲线编辑器中修改 Generator 修改器的一次项系数\n"
+        "- 删除动画: 使用 anim_remove_driver 工具"
+    )
+    return _result(True, tips)
 
 
 def anim_add_uv_rotate(material_name: str, node_name: str,
-                       speed: float = 0.01, axis: str = "Z") -> dict:
+                       speed: float = 0.01, axis: str = "Z", verbose: bool = True) -> dict:
     """为 Mapping 节点的 Rotation 添加 Driver，实现 UV 旋转动画"""
-    try:
-        mat = _get_material(material_name)
-        node = _get_node(mat, node_name)
+    mat, node = _resolve(material_name, node_name)
 
-        if node.type != 'MAPPING':
-            return _result(False, None, f"{node_name} 不是 Mapping 节点")
+    if not isinstance(node, bpy.types.ShaderNodeMapping):
+        raise ValueError(f"{node_name} 不是 Mapping 节点")
 
-        axis_map = {'X': 0, 'Y': 1, 'Z': 2}
-        axis = axis.upper()
-        if axis not in axis_map:
-            return _result(False, None, f"无效轴: {axis}，可用: X, Y, Z")
+    axis = axis.upper()
+    idx = _AXIS_IDX.get(axis)
+    if idx is None:
+        raise ValueError(f"无效轴: {axis}，可用: X, Y, Z")
 
-        rot_input = node.inputs.get('Rotation')
-        if rot_input is None:
-            return _result(False, None, "Mapping 节点没有 Rotation 输入")
+    rot_input = node.inputs.get('Rotation')
+    if rot_input is None:
+        raise ValueError("Mapping 节点没有 Rotation 输入")
 
-        idx = axis_map[axis]
+    if _add_linear_fcurve(rot_input, idx, 0.0, speed) is None:
         fcurve = rot_input.driver_add("default_value", idx)
-        driver = fcurve.driver
-        driver.type = 'SCRIPTED'
-        driver.expression = f"frame * {speed}"
-
-        tips = (
-            f"已为 {node_name} 添加UV旋转: {axis}轴, 速度={speed}弧度/帧\n\n"
-            "调整提示:\n"
-            f"- 当前速度 {speed} 弧度/帧 ≈ {round(math.degrees(speed), 2)} 度/帧\n"
-            "- 加快: 增大 speed 值\n"
-            "- 反转: 使用负数 speed"
-        )
-        return _result(True, tips)
+        _setup_linear_driver(fcurve, 0.0, speed)
 
-    except Exception as e:
-        return _result(False, None, str(e))
+    summary = f"已为 {node_name} 添加UV旋转: {axis}轴, 速度={speed}弧度/帧"
+    if not verbose:
+        return _result(True, summary)
+    tips = (
+        f"{summary}\n\n"
+        "调整提示:\n"
+        f"- 当前速度 {speed} 弧度/帧 ≈ {round(speed * _RAD_TO_DEG, 2)} 度/帧\n"
+        "- 加快: 增大 speed 值\n"
+        "- 反转: 使用负数 speed"
+    )
+    return _result(True, tips)
 
 
 def anim_add_uv_scale(material_name: str, node_name: str,
                       speed_x: float = 0.0, speed_y: float = 0.0, speed_z: float = 0.0,
-                      base_scale: float = 1.0) -> dict:
+                      base_scale: float = 1.0, verbose: bool = True) -> dict:
     """为 Mapping 节点的 Scale 添加 Driver，实现 UV 缩放动画"""
-    try:
-        mat = _get_material(material_name)
-        node = _get_node(mat, node_name)
-
-        if node.type != 'MAPPING':
-            return _result(False, None, f"{node_name} 不是 Mapping 节点")
-
-        speeds = [speed_x, speed_y, speed_z]
-        axes = ['X', 'Y', 'Z']
-        added = []
-
-        for i, (speed, axis) in enumerate(zip(speeds, axes)):
-            if speed == 0.0:
-                continue
-
-            scale_input = node.inputs.get('Scale')
-            if scale_input is None:
-                return _result(False, None, "Mapping 节点没有 Scale 输入")
-
-            fcurve = scale_input.driver_add("default_value", i)
-            driver = fcurve.driver
-            driver.type = 'SCRIPTED'
-            driver.expression = f"{base_scale} + frame * {speed}"
-
-            added.append(f"{axis}={speed}/帧(基础={base_scale})")
-
-        if not added:
-            return _result(False, None, "至少需要一个轴的速度不为0")
-
-        tips = (
-            f"已为 {node_name} 添加UV缩放动画: {', '.join(added)}\n\n"
-            "调整提示:\n"
-            "- base_scale 是初始缩放值\n"
-            "- speed 控制每帧缩放变化量\n"
-            "- 用 sin(frame*0.1) 可做呼吸/脉动效果"
-        )
-        return _result(True, tips)
-
-    except Exception as e:
-        return _result(False, None, str(e))
+    mat, node = _resolve(material_name, node_name)
+
+    if not isinstance(node, bpy.types.ShaderNodeMapping):
+        raise ValueError(f"{node_name} 不是 Mapping 节点")
+
+    scale_input = node.inputs.get('Scale')
+    if scale_input is None:
+        raise ValueError("Mapping 节点没有 Scale 输入")
+
+    speeds = (speed_x, speed_y, speed_z)
+    active = [(i, speeds[i], "XYZ"[i]) for i in range(3) if speeds[i] != 0.0]
+    if not active:
+        raise ValueError("至少需要一个轴的速度不为0")
+
+    # 优先无驱动的 Generator F-Curve；已有关键帧的分量回退到驱动
+    fallback = [i for i, speed, _ in active if _add_linear_fcurve(scale_input, i, base_scale, speed) is None]
+    fcurves = _driver_fcurves(scale_input, fallback) if fallback else {}
+
+    added = []
+    for i, speed, axis in active:
+        if i in fcurves:
+            _setup_linear_driver(fcurves[i], base_scale, speed)
+        added.append(f"{axis}={speed}/帧(基础={base_scale})")
+
+    summary = f"已为 {node_name} 添加UV缩放动画: {', '.join(added)}"
+    if not verbose:
+        return _result(True, summary)
+    tips = (
+        f"{summary}\n\n"
+        "调整提示:\n"
+        "- base_scale 是初始缩放值\n"
+        "- speed 控制每帧缩放变化量\n"
+        "- 用 sin(frame*0.1) 可做呼吸/脉动效果"
+    )
+    return _result(True, tips)
 
 
 def anim_add_value_driver(material_name: str, node_name: str,
@@ -152,101 +374,261 @@ def anim_add_value_driver(material_name: str, node_name: str,
       "0.5 + 0.5*sin(frame*0.05)" - 0~1范围波动
       "(frame % 60) / 60"     - 60帧循环
     """
-    try:
-        mat = _get_material(material_name)
-        node = _get_node(mat, node_name)
-
-        inp = node.inputs.get(input_name)
-        if inp is None:
-            return _result(False, None, f"输入不存在: {input_name}")
-
-        if index >= 0:
-            fcurve = inp.driver_add("default_value", index)
+    mat, node = _resolve(material_name, node_name)
+
+    inp = node.inputs.get(input_name)
+    if inp is None:
+        raise ValueError(f"输入不存在: {input_name}")
+
+    if index >= 0:
+        fcurves = inp.driver_add("default_value", index)
+    else:
+        fcurves = inp.driver_add("default_value")
+    if not isinstance(fcurves, list):
+        fcurves = [fcurves]
+
+    linear = parse_linear_expression(expression)
+    driver_expression = expression
+    if linear is None and not uses_default_driver_names(expression):
+        # 只用默认驱动命名空间的表达式原样写入，.blend 在未启用本插件时也能求值；
+        # 引用了其他名字的才预编译并注册为 _drv_* 函数，驱动只做一次函数调用
+        func_name = _register_driver_expression(expression)
+        exprs = dict(mat.get(_DRIVER_EXPR_PROP) or {})
+        exprs[func_name] = expression
+        mat[_DRIVER_EXPR_PROP] = exprs
+        driver_expression = f"{func_name}(frame)"
+    for fcurve in fcurves:
+        if linear is not None:
+            _setup_linear_driver(fcurve, *linear)
         else:
-            fcurve = inp.driver_add("default_value")
-
-        driver = fcurve.driver
-        driver.type = 'SCRIPTED'
-        driver.expression = expression
-
-        tips = (
-            f"已为 {node_name}.{input_name} 添加Driver: {expression}\n\n"
-            "调整提示:\n"
-            "- 在Driver编辑器中可修改表达式\n"
-            "- 可用函数: sin, cos, tan, abs, min, max, pow, sqrt\n"
-            "- 可用变量: frame (当前帧号)"
-        )
-        return _result(True, tips)
-
-    except Exception as e:
-        return _result(False, None, str(e))
+            driver = fcurve.driver
+            driver.type = 'SCRIPTED'
+            driver.expression = driver_expression
+
+    tips = (
+        f"已为 {node_name}.{input_name} 添加Driver: {expression}\n\n"
+        "调整提示:\n"
+        "- 在Driver编辑器中可修改表达式\n"
+        "- 可用函数: sin, cos, tan, abs, min, max, pow, sqrt\n"
+        "- 可用变量: frame (当前帧号)"
+    )
+    return _result(True, tips)
+
+
+def anim_add_template_driver(material_name: str, node_name: str,
+                             input_name: str, template: str = "linear",
+                             params: list = None, index: int = -1) -> dict:
+    """用预置模板添加驱动动画
+
+    模板（params 按顺序）:
+      linear(k, base=0)                   - base + frame*k
+      sine(amp, freq, phase=0, offset=0)  - offset + amp*sin(frame*freq+phase)
+      pulse(period, duty=0.5)             - 周期方波 0/1
+      sawtooth(period)                    - 0~1 锯齿循环
+    """
+    expression = expand_driver_template(template, params)
+    return anim_add_value_driver(material_name, node_name, input_name, expression, index)
 
 
 def anim_add_keyframe(material_name: str, node_name: str,
                       input_name: str, frame: int, value,
                       index: int = -1) -> dict:
-    """为节点输入在指定帧插入关键帧"""
-    try:
-        mat = _get_material(material_name)
-        node = _get_node(mat, node_name)
+    """为节点输入在指定帧插入关键帧（多帧请用 anim_add_keyframes 一次写入）"""
+    mat, node = _resolve(material_name, node_name)
+
+    inp = node.inputs.get(input_name)
+    if inp is None:
+        raise ValueError(f"输入不存在: {input_name}")
+
+    if isinstance(value, (list, tuple)):
+        # 一次写入整个数组，避免逐分量跨 RNA 赋值
+        target = inp.default_value
+        if len(value) == len(target):
+            target.foreach_set(value)
+        else:
+            target[:len(value)] = value
+        inp.keyframe_insert("default_value", frame=frame)
+    else:
+        if index >= 0:
+            inp.default_value[index] = value
+            inp.keyframe_insert("default_value", index=index, frame=frame)
+        else:
+            inp.default_value = value
+            inp.keyframe_insert("default_value", frame=frame)
 
-        inp = node.inputs.get(input_name)
-        if inp is None:
-            return _result(False, None, f"输入不存在: {input_name}")
+    return _result(True, f"已在第 {frame} 帧为 {node_name}.{input_name} 插入关键帧: {value}")
 
-        if isinstance(value, (list, tuple)):
-            for i, v in enumerate(value):
-                inp.default_value[i] = v
-            inp.keyframe_insert("default_value", frame=frame)
+
+def anim_add_keyframes(material_name: str, node_name: str,
+                       input_name: str, frames: list, values: list,
+                       index: int = -1, interpolation: str = "") -> dict:
+    """为节点输入批量插入关键帧（一次 F-Curve 写入，适合烘焙/密集关键帧）
+
+    values 每项为数字（写入 index 分量，-1 表示标量）或与输入等长的数组。
+    """
+    mat, node = _resolve(material_name, node_name)
+
+    inp = node.inputs.get(input_name)
+    if inp is None:
+        raise ValueError(f"输入不存在: {input_name}")
+    if not frames or len(frames) != len(values):
+        raise ValueError("frames 与 values 必须非空且长度一致")
+
+    is_array = hasattr(inp.default_value, "__len__")
+    if isinstance(values[0], (list, tuple)):
+        columns = [list(c) for c in zip(*values)]
+        channels = range(len(columns))
+    else:
+        columns = [values]
+        channels = [index if index >= 0 else 0]
+
+    data_path = inp.path_from_id("default_value")
+    for channel, column in zip(channels, columns):
+        # 先插入一帧以创建 F-Curve（及 Action），再整体写入
+        if is_array:
+            inp.default_value[channel] = column[0]
+            inp.keyframe_insert("default_value", index=channel, frame=frames[0])
         else:
-            if index >= 0:
-                inp.default_value[index] = value
-                inp.keyframe_insert("default_value", index=index, frame=frame)
+            inp.default_value = column[0]
+            inp.keyframe_insert("default_value", frame=frames[0])
+        fcurve = _find_fcurve(inp.id_data, data_path, channel)
+        if fcurve is None:
+            raise ValueError(f"未找到 F-Curve: {data_path}[{channel}]")
+        _write_keyframes(fcurve, frames, column, interpolation)
+
+    return _result(
+        True,
+        f"已为 {node_name}.{input_name} 批量插入 {len(frames)} 个关键帧"
+        f"（第 {min(frames)}~{max(frames)} 帧）",
+    )
+
+
+def anim_bake_expression(material_name: str, node_name: str,
+                         input_name: str, expression: str,
+                         frame_start: int = 1, frame_end: int = 250,
+                         index: int = -1, interpolation: str = "") -> dict:
+    """把表达式在帧区间上一次性求值并烘焙为关键帧（替代逐帧求值的 Driver）
+
+    expression 为 frame 的算术表达式，可用 _BAKE_GLOBALS 中的数学函数；不支持条件表达式、
+    and/or/not、noise 与 bpy。会移除该输入上已有的 Driver / Generator。
+    """
+    if frame_end < frame_start:
+        raise ValueError("frame_end 不能小于 frame_start")
+    check_vectorized_expression(expression, _BAKE_NAMES)
+    mat, node = _resolve(material_name, node_name)
+
+    inp = node.inputs.get(input_name)
+    if inp is None:
+        raise ValueError(f"输入不存在: {input_name}")
+
+    frames = np.arange(frame_start, frame_end + 1, dtype=np.float64)
+    code = compile(expression, "<bake>", "eval")
+    with np.errstate(all="ignore"):
+        values = np.broadcast_to(
+            np.asarray(eval(code, _BAKE_GLOBALS, {"frame": frames}), dtype=np.float64),
+            frames.shape,
+        )
+    if not np.isfinite(values).all():
+        raise ValueError(f"表达式在 {frame_start}~{frame_end} 帧内产生了非有限值: {expression}")
+
+    is_array = hasattr(inp.default_value, "__len__")
+    if index >= 0:
+        channels = [index]
+    else:
+        channels = range(len(inp.default_value)) if is_array else [0]
+
+    # 驱动会覆盖关键帧结果，先移除
+    if index >= 0:
+        inp.driver_remove("default_value", index)
+    else:
+        inp.driver_remove("default_value")
+    _clear_linear_fcurves(inp, index)
+
+    data_path = inp.path_from_id("default_value")
+    for channel in channels:
+        fcurve = _find_fcurve(inp.id_data, data_path, channel)
+        if fcurve is None:
+            # 先插入一帧以创建 F-Curve（及 Action），再整体写入
+            if is_array:
+                inp.default_value[channel] = values[0]
+                inp.keyframe_insert("default_value", index=channel, frame=frame_start)
             else:
-                inp.default_value = value
-                inp.keyframe_insert("default_value", frame=frame)
-
-        return _result(True, f"已在第 {frame} 帧为 {node_name}.{input_name} 插入关键帧: {value}")
+                inp.default_value = values[0]
+                inp.keyframe_insert("default_value", frame=frame_start)
+            fcurve = _find_fcurve(inp.id_data, data_path, channel)
+            if fcurve is None:
+                raise ValueError(f"未找到 F-Curve: {data_path}[{channel}]")
+        _write_keyframes(fcurve, frames, values, interpolation)
 
-    except Exception as e:
-        return _result(False, None, str(e))
+    return _result(
+        True,
+        f"已将 {node_name}.{input_name} 的表达式 {expression} 烘焙为关键帧"
+        f"（第 {frame_start}~{frame_end} 帧，共 {len(frames)} 帧）",
+    )
 
 
 def anim_remove_driver(material_name: str, node_name: str,
                        input_name: str, index: int = -1) -> dict:
-    """移除节点输入上的 Driver"""
-    try:
-        mat = _get_material(material_name)
-        node = _get_node(mat, node_name)
+    """移除节点输入上的 Driver（及 UV 工具创建的 Generator 动画）"""
+    mat, node = _resolve(material_name, node_name)
 
-        inp = node.inputs.get(input_name)
-        if inp is None:
-            return _result(False, None, f"输入不存在: {input_name}")
+    inp = node.inputs.get(input_name)
+    if inp is None:
+        raise ValueError(f"输入不存在: {input_name}")
 
-        if index >= 0:
-            inp.driver_remove("default_value", index)
-        else:
-            inp.driver_remove("default_value")
+    if index >= 0:
+        inp.driver_remove("default_value", index)
+    else:
+        inp.driver_remove("default_value")
+    _clear_linear_fcurves(inp, index)
 
-        return _result(True, f"已移除 {node_name}.{input_name} 的Driver")
+    return _result(True, f"已移除 {node_name}.{input_name} 的Driver")
 
-    except Exception as e:
-        return _result(False, None, str(e))
+
+# 工具分发表（导入时构建一次，只读）
+_ANIM_TOOLS = types.MappingProxyType({
+    "anim_add_uv_scroll": anim_add_uv_scroll,
+    "anim_add_uv_rotate": anim_add_uv_rotate,
+    "anim_add_uv_scale": anim_add_uv_scale,
+    "anim_add_value_driver": anim_add_value_driver,
+    "anim_add_template_driver": anim_add_template_driver,
+    "anim_add_keyframe": anim_add_keyframe,
+    "anim_add_keyframes": anim_add_keyframes,
+    "anim_bake_expression": anim_bake_expression,
+    "anim_remove_driver": anim_remove_driver,
+})
+
+
+_HANDLERS = (
+    ("load_post", _restore_driver_expressions),
+)
+
+
+def register():
+    for event, func in _HANDLERS:
+        handlers = getattr(bpy.app.handlers, event)
+        if func not in handlers:
+            handlers.append(func)
+    bpy.app.timers.register(_restore_driver_expressions, first_interval=0.0)
+
+
+def unregister():
+    for event, func in _HANDLERS:
+        handlers = getattr(bpy.app.handlers, event)
+        if func in handlers:
+            handlers.remove(func)
+    namespace = bpy.app.driver_namespace
+    for name in _DRIVER_NAMES:
+        namespace.pop(name, None)
+    _DRIVER_NAMES.clear()
 
 
 def execute_anim_tool(tool_name: str, arguments: dict) -> dict:
-    try:
-        tools_map = {
-            "anim_add_uv_scroll": anim_add_uv_scroll,
-            "anim_add_uv_rotate": anim_add_uv_rotate,
-            "anim_add_uv_scale": anim_add_uv_scale,
-            "anim_add_value_driver": anim_add_value_driver,
-            "anim_add_keyframe": anim_add_keyframe,
-            "anim_remove_driver": anim_remove_driver,
-        }
-        func = tools_map.get(tool_name)
-        if func:
-            return func(**arguments)
+    """动画工具统一入口；各工具校验失败直接抛出 ValueError，在此统一转为结果"""
+    func = _ANIM_TOOLS.get(tool_name)
+    if func is None:
         return _result(False, None, f"未知动画工具: {tool_name}")
+    try:
+        return func(**arguments)
     except Exception as e:
         return _result(False, None, str(e))
@@ -8,10 +8,129 @@ import os
 import re
 import time
 import base64
+import hashlib
+import threading
+import weakref
 import mimetypes
-from datetime import datetime
+from collections import OrderedDict
+from itertools import chain, islice
+from types import MethodType
 from bpy.props import StringProperty, CollectionProperty, IntProperty, BoolProperty, EnumProperty, FloatProperty
 from bpy.types import PropertyGroup, Operator, Panel, AddonPreferences, UIList
+from .core.chat_helpers import EchoFilter, preview_args
+
+# safety_guard 只依赖 re，导入时解析一次；缺失时退化为不检测
+try:
+    from .core.safety_guard import references_foreign_toolset as _REFS_FOREIGN
+    from .core.safety_guard import looks_like_final_summary as _IS_FINAL_SUMMARY
+except Exception:
+    _REFS_FOREIGN = None
+    _IS_FINAL_SUMMARY = None
+
+
+# ========== 枚举选项（模块级常量，注册时只构建一次） ==========
+
+_MODEL_ITEMS = (
+    ("claude-sonnet-4-5", "Claude Sonnet 4.5", "平衡性能和速度"),
+    ("claude-sonnet-4-6", "Claude Sonnet 4.6", "最新 Sonnet"),
+    ("claude-sonnet-4-5-kiro", "Claude Sonnet 4.5 Kiro", "Kiro 优化版"),
+    ("claude-opus-4-5-kiro", "Claude Opus 4.5 Kiro", "Opus Kiro"),
+    ("claude-opus-4-6-kiro", "Claude Opus 4.6 Kiro", "最新 Opus Kiro"),
+    ("claude-opus-4-5-gemini", "Claude Opus 4.5 Gemini", "Opus Gemini 混合"),
+    ("claude-haiku-4-5", "Claude Haiku 4.5", "最快速度"),
+    ("gpt-5.2-codex", "GPT-5.2 Codex", "代码专精"),
+    ("gpt-5.3-codex", "GPT-5.3 Codex", "400K上下文 代码专精"),
+    ("gemini-3-flash-preview", "Gemini 3 Flash", "1M上下文 快速"),
+    ("gemini-3-pro-preview", "Gemini 3 Pro", "1M上下文 强性能"),
+    ("gemini-3-pro-image-preview", "Gemini 3 Pro Image", "支持图片输出"),
+    ("glm-5", "GLM-5", "智谱最新"),
+)
+_AGENT_MODE_ITEMS = (
+    ("native", "Native Tool Use", "使用 API 原生 tool_use（Anthropic/OpenAI 标准）"),
+    ("structured", "Structured XML", "LLM 生成文本 + XML 标签，外部解析器触发工具（更省 token，兼容性更好）"),
+)
+_CONVERSATION_MODE_ITEMS = (
+    ("llm_agent", "Agent", "LLM Agent 对话（材质、场景、修改器、文件等 MCP 工具）"),
+    ("meshy_pipeline", "Meshy", "Meshy 一站式（文生3D/图生3D/自动导入/后处理）"),
+)
+_THEME_PRESET_ITEMS = (
+    ("system", "跟随系统", "使用 Blender 当前主题"),
+    ("catppuccin_latte", "Catppuccin Latte", "浅色、柔和低对比"),
+    ("catppuccin_frappe", "Catppuccin Frappe", "中暗、柔和低对比"),
+    ("catppuccin_macchiato", "Catppuccin Macchiato", "暗色、柔和低对比"),
+    ("catppuccin_mocha", "Catppuccin Mocha", "深暗、柔和低对比"),
+)
+_PERMISSION_LEVEL_ITEMS = (
+    ("high", "高权限（推荐）", "默认放行大多数工具，仅高风险工具可选确认"),
+    ("balanced", "平衡", "中高风险工具执行前询问"),
+    ("conservative", "保守", "拦截高风险工具，仅放行低风险工具"),
+)
+_MESHY_MODEL_ITEMS = (
+    ("meshy-6", "Meshy 6", "最新版本，质量最好"),
+    ("meshy-5", "Meshy 5", "上一代版本"),
+)
+_MESHY_PRESET_ITEMS = (
+    ("realistic", "写实", "通用写实微调"),
+    ("toon", "卡通", "更平滑、低高光、偏NPR"),
+    ("metal", "金属", "高金属度、低粗糙度反射"),
+    ("glass", "玻璃", "高透射、低粗糙度、IOR优化"),
+)
+_MESHY_STRENGTH_ITEMS = (
+    ("light", "轻度", "小幅微调，尽量保留原始材质"),
+    ("medium", "中度", "平衡微调"),
+    ("strong", "强", "更明显的风格强化"),
+)
+_TODO_TYPE_ITEMS = (
+    ("USER", "👤 用户", "用户自己要做的事"),
+    ("AGENT", "🤖 Agent", "让 Agent 去做的事"),
+)
+_EXPORT_FORMAT_ITEMS = (
+    ("json", "JSON", "导出完整 JSON 报告"),
+    ("csv", "CSV", "导出简化 CSV 报告"),
+)
+
+
+# 偏好设置面板布局：(类型, 参数, 图标, 显示条件)
+# section 开启新的分组框；prop/label/url 画在当前分组框内；cond 为 None 表示总是显示
+_PREFS_LAYOUT = (
+    ("section", "🤖 Claude API 配置", 'PREFERENCES', None),
+    ("prop", "api_base", None, None),
+    ("prop", "api_key", None, None),
+    ("prop", "model", None, None),
+    ("prop", "custom_model", None, None),
+    ("label", "⚠️ 请填写 Claude API Key 才能使用 AI 助手", 'ERROR', lambda p: not p.api_key),
+    ("separator", None, None, None),
+    ("section", "⚙️ Agent 设置", 'TOOL_SETTINGS', None),
+    ("prop", "conversation_mode", None, None),
+    ("prop", "agent_mode", None, None),
+    ("prop", "auto_fallback_on_no_toolcall", None, None),
+    ("prop", "ui_readable_mode", None, None),
+    ("prop", "ui_scale_factor", None, lambda p: p.ui_readable_mode),
+    ("prop", "ui_theme_preset", None, None),
+    ("label", "ℹ️ XML 模式：LLM 生成文本 + XML 标签，更省 token", 'INFO', lambda p: p.agent_mode == "structured"),
+    ("separator", None, None, None),
+    ("section", "🔐 权限控制", 'LOCKED', None),
+    ("prop", "ai_permission_level", None, None),
+    ("prop", "confirm_high_risk_tools", None, None),
+    ("prop", "allow_destructive_tools", None, None),
+    ("prop", "allow_file_write_tools", None, None),
+    ("prop", "allow_network_tools", None, None),
+    ("label", "说明：高风险操作会先请求授权，授权后自动继续。", 'INFO', None),
+    ("separator", None, None, None),
+    ("section", "🎨 Meshy AI 配置", 'MESH_MONKEY', None),
+    ("prop", "meshy_api_key", None, None),
+    ("prop", "meshy_ai_model", None, None),
+    ("prop", "meshy_auto_postprocess", None, None),
+    ("prop", "meshy_postprocess_preset", None, lambda p: p.meshy_auto_postprocess),
+    ("prop", "meshy_postprocess_strength", None, lambda p: p.meshy_auto_postprocess),
+    ("label", "⚠️ 请填写 Meshy API Key 才能使用 3D 生成功能", 'INFO', lambda p: not p.meshy_api_key),
+    ("url", ("获取 Meshy API Key", "https://www.meshy.ai/settings/api"), 'URL', lambda p: not p.meshy_api_key),
+)
+
+
+def _on_agent_config_changed(self, context):
+    # Agent 相关配置变化时让 get_agent 重新计算配置键
+    _agent_key_cache.clear()
 
 
 class BlenderAgentPreferences(AddonPreferences):
@@ -21,6 +140,7 @@ class BlenderAgentPreferences(AddonPreferences):
         name="API 地址",
         description="Claude API 地址（如 https://api.anthropic.com 或中转地址）",
         default="https://api.anthropic.com",
+        update=_on_agent_config_changed,
     )
 
     api_key: StringProperty(
@@ -28,51 +148,35 @@ class BlenderAgentPreferences(AddonPreferences):
         description="你的 Claude API Key",
         default="",
         subtype='PASSWORD',
+        update=_on_agent_config_changed,
     )
 
     model: EnumProperty(
         name="模型",
         description="选择使用的模型",
-        items=[
-            ("claude-sonnet-4-5", "Claude Sonnet 4.5", "平衡性能和速度"),
-            ("claude-sonnet-4-6", "Claude Sonnet 4.6", "最新 Sonnet"),
-            ("claude-sonnet-4-5-kiro", "Claude Sonnet 4.5 Kiro", "Kiro 优化版"),
-            ("claude-opus-4-5-kiro", "Claude Opus 4.5 Kiro", "Opus Kiro"),
-            ("claude-opus-4-6-kiro", "Claude Opus 4.6 Kiro", "最新 Opus Kiro"),
-            ("claude-opus-4-5-gemini", "Claude Opus 4.5 Gemini", "Opus Gemini 混合"),
-            ("claude-haiku-4-5", "Claude Haiku 4.5", "最快速度"),
-            ("gpt-5.2-codex", "GPT-5.2 Codex", "代码专精"),
-            ("gpt-5.3-codex", "GPT-5.3 Codex", "400K上下文 代码专精"),
-            ("gemini-3-flash-preview", "Gemini 3 Flash", "1M上下文 快速"),
-            ("gemini-3-pro-preview", "Gemini 3 Pro", "1M上下文 强性能"),
-            ("gemini-3-pro-image-preview", "Gemini 3 Pro Image", "支持图片输出"),
-            ("glm-5", "GLM-5", "智谱最新"),
-        ],
+        items=_MODEL_ITEMS,
         default="claude-sonnet-4-5",
+        update=_on_agent_config_changed,
     )
 
     custom_model: StringProperty(
         name="自定义模型",
         description="如果使用中转API，可以填写自定义模型名称（留空则使用上方选择）",
         default="",
+        update=_on_agent_config_changed,
     )
 
     agent_mode: EnumProperty(
         name="Agent 模式",
         description="选择 Agent 工具调用模式",
-        items=[
-            ("native", "Native Tool Use", "使用 API 原生 tool_use（Anthropic/OpenAI 标准）"),
-            ("structured", "Structured XML", "LLM 生成文本 + XML 标签，外部解析器触发工具（更省 token，兼容性更好）"),
-        ],
+        items=_AGENT_MODE_ITEMS,
         default="native",
+        update=_on_agent_config_changed,
     )
     conversation_mode: EnumProperty(
         name="对话通道",
         description="聊天框执行通道：Agent 负责 MCP 操作，Meshy 负责模型生成与导入",
-        items=[
-            ("llm_agent", "Agent", "LLM Agent 对话（材质、场景、修改器、文件等 MCP 工具）"),
-            ("meshy_pipeline", "Meshy", "Meshy 一站式（文生3D/图生3D/自动导入/后处理）"),
-        ],
+        items=_CONVERSATION_MODE_ITEMS,
         default="llm_agent",
     )
     auto_fallback_on_no_toolcall: BoolProperty(
@@ -95,24 +199,14 @@ class BlenderAgentPreferences(AddonPreferences):
     ui_theme_preset: EnumProperty(
         name="主题预设",
         description="插件界面风格预设（Catppuccin 低对比风格）",
-        items=[
-            ("system", "跟随系统", "使用 Blender 当前主题"),
-            ("catppuccin_latte", "Catppuccin Latte", "浅色、柔和低对比"),
-            ("catppuccin_frappe", "Catppuccin Frappe", "中暗、柔和低对比"),
-            ("catppuccin_macchiato", "Catppuccin Macchiato", "暗色、柔和低对比"),
-            ("catppuccin_mocha", "Catppuccin Mocha", "深暗、柔和低对比"),
-        ],
+        items=_THEME_PRESET_ITEMS,
         default="catppuccin_mocha",
     )
 
     ai_permission_level: EnumProperty(
         name="AI 权限级别",
         description="控制 Agent 执行 MCP 工具时的默认权限强度",
-        items=[
-            ("high", "高权限（推荐）", "默认放行大多数工具，仅高风险工具可选确认"),
-            ("balanced", "平衡", "中高风险工具执行前询问"),
-            ("conservative", "保守", "拦截高风险工具，仅放行低风险工具"),
-        ],
+        items=_PERMISSION_LEVEL_ITEMS,
         default="high",
     )
 
@@ -151,10 +245,7 @@ class BlenderAgentPreferences(AddonPreferences):
     meshy_ai_model: EnumProperty(
         name="Meshy 模型",
         description="Meshy AI 生成模型版本",
-        items=[
-            ("meshy-6", "Meshy 6", "最新版本，质量最好"),
-            ("meshy-5", "Meshy 5", "上一代版本"),
-        ],
+        items=_MESHY_MODEL_ITEMS,
         default="meshy-6",
     )
     meshy_auto_postprocess: BoolProperty(
@@ -165,80 +256,46 @@ class BlenderAgentPreferences(AddonPreferences):
     meshy_postprocess_preset: EnumProperty(
         name="Meshy材质优化预设",
         description="导入后自动材质优化风格",
-        items=[
-            ("realistic", "写实", "通用写实微调"),
-            ("toon", "卡通", "更平滑、低高光、偏NPR"),
-            ("metal", "金属", "高金属度、低粗糙度反射"),
-            ("glass", "玻璃", "高透射、低粗糙度、IOR优化"),
-        ],
+        items=_MESHY_PRESET_ITEMS,
         default="realistic",
     )
     meshy_postprocess_strength: EnumProperty(
         name="Meshy材质优化强度",
         description="后处理参数应用强度",
-        items=[
-            ("light", "轻度", "小幅微调，尽量保留原始材质"),
-            ("medium", "中度", "平衡微调"),
-            ("strong", "强", "更明显的风格强化"),
-        ],
+        items=_MESHY_STRENGTH_ITEMS,
         default="medium",
     )
 
     def draw(self, context):
         layout = self.layout
-
-        layout.label(text="🤖 Claude API 配置", icon='PREFERENCES')
-        box = layout.box()
-        box.prop(self, "api_base")
-        box.prop(self, "api_key")
-        box.prop(self, "model")
-        box.prop(self, "custom_model")
-
-        if not self.api_key:
-            box.label(text="⚠️ 请填写 Claude API Key 才能使用 AI 助手", icon='ERROR')
-
-        layout.separator()
-        layout.label(text="⚙️ Agent 设置", icon='TOOL_SETTINGS')
-        box = layout.box()
-        box.prop(self, "conversation_mode")
-        box.prop(self, "agent_mode")
-        box.prop(self, "auto_fallback_on_no_toolcall")
-        box.prop(self, "ui_readable_mode")
-        if self.ui_readable_mode:
-            box.prop(self, "ui_scale_factor")
-        box.prop(self, "ui_theme_preset")
-        if self.agent_mode == "structured":
-            box.label(text="ℹ️ XML 模式：LLM 生成文本 + XML 标签，更省 token", icon='INFO')
-        layout.separator()
-        layout.label(text="🔐 权限控制", icon='LOCKED')
-        sec = layout.box()
-        sec.prop(self, "ai_permission_level")
-        sec.prop(self, "confirm_high_risk_tools")
-        sec.prop(self, "allow_destructive_tools")
-        sec.prop(self, "allow_file_write_tools")
-        sec.prop(self, "allow_network_tools")
-        sec.label(text="说明：高风险操作会先请求授权，授权后自动继续。", icon='INFO')
-
-        layout.separator()
-
-        layout.label(text="🎨 Meshy AI 配置", icon='MESH_MONKEY')
-        box = layout.box()
-        box.prop(self, "meshy_api_key")
-        box.prop(self, "meshy_ai_model")
-        box.prop(self, "meshy_auto_postprocess")
-        if self.meshy_auto_postprocess:
-            box.prop(self, "meshy_postprocess_preset")
-            box.prop(self, "meshy_postprocess_strength")
-
-        if not self.meshy_api_key:
-            box.label(text="⚠️ 请填写 Meshy API Key 才能使用 3D 生成功能", icon='INFO')
-            box.operator("wm.url_open", text="获取 Meshy API Key", icon='URL').url = "https://www.meshy.ai/settings/api"
+        box = layout
+        for kind, arg, icon, cond in _PREFS_LAYOUT:
+            if cond is not None and not cond(self):
+                continue
+            if kind == "prop":
+                box.prop(self, arg)
+            elif kind == "label":
+                box.label(text=arg, icon=icon)
+            elif kind == "section":
+                layout.label(text=arg, icon=icon)
+                box = layout.box()
+            elif kind == "separator":
+                layout.separator()
+            elif kind == "url":
+                text, url = arg
+                box.operator("wm.url_open", text=text, icon=icon).url = url
 
 
 def get_preferences():
+    # 每次都重新取：AddonPreferences 不是 ID，偏好设置重新读取后旧包装会悬空且不抛异常
     return bpy.context.preferences.addons[__package__].preferences
 
 
+@bpy.app.handlers.persistent
+def _invalidate_preferences_cache(*_args):
+    _agent_key_cache.clear()
+
+
 # ========== 数据模型 ==========
 
 
@@ -246,6 +303,10 @@ class ChatMessage(PropertyGroup):
     role: StringProperty(name="Role")
     content: StringProperty(name="Content")
     is_code: BoolProperty(name="Is Code", default=False)
+    # 以下为插入时预计算的显示字段，列表重绘时不再扫描 content
+    preview: StringProperty(name="Preview")
+    icon: StringProperty(name="Icon")
+    has_more: BoolProperty(name="Has More", default=False)
 
 
 class TodoItem(PropertyGroup):
@@ -253,12 +314,11 @@ class TodoItem(PropertyGroup):
     done: BoolProperty(name="Done", default=False)
     todo_type: EnumProperty(
         name="Type",
-        items=[
-            ("USER", "用户", "用户自己要做的事"),
-            ("AGENT", "Agent", "让 Agent 去做的事"),
-        ],
+        items=_TODO_TYPE_ITEMS,
         default="USER",
     )
+    # 预先拼好的行文本，绘制时直接使用
+    display: StringProperty(name="Display", default="")
 
 
 class AgentState(PropertyGroup):
@@ -270,10 +330,13 @@ class AgentState(PropertyGroup):
     is_processing: BoolProperty(name="Processing", default=False)
     pending_code: StringProperty(name="Pending Code", default="")
     pending_code_desc: StringProperty(name="Pending Code Desc", default="")
+    pending_code_preview: StringProperty(name="Pending Code Preview", default="")
+    pending_code_has_more: BoolProperty(name="Pending Code Has More", default=False)
     pending_permission_tool: StringProperty(name="Pending Permission Tool", default="")
     pending_permission_args: StringProperty(name="Pending Permission Args", default="")
     pending_permission_risk: StringProperty(name="Pending Permission Risk", default="")
     pending_permission_reason: StringProperty(name="Pending Permission Reason", default="")
+    pending_permission_reason_preview: StringProperty(name="Pending Permission Reason Preview", default="")
     pending_tool_id: StringProperty(name="Pending Tool ID", default="")
     last_user_message: StringProperty(name="Last User Message", default="")
     last_exec_status: StringProperty(name="Last Exec Status", default="idle")
@@ -288,17 +351,19 @@ class AgentState(PropertyGroup):
     todo_input: StringProperty(name="Todo Input", default="")
     todo_type_input: EnumProperty(
         name="Todo Type",
-        items=[
-            ("USER", "👤 用户", "用户自己要做的事"),
-            ("AGENT", "🤖 Agent", "让 Agent 去做的事"),
-        ],
+        items=_TODO_TYPE_ITEMS,
         default="USER",
     )
 
 
 # ========== Agent 实例管理 ==========
 
-_agents_cache = {}
+# (api_base, api_key, model, mode) → Agent，LRU；每种模式各留一个，切换模型时淘汰旧实例
+_agents_cache = OrderedDict()
+_AGENT_CACHE_MAX = 2
+# (偏好设置指针, mode_override) → Agent；相关配置变化时清空，稳态下 get_agent 只做一次字典查找
+_agent_key_cache = {}
+_MISSING = object()
 
 
 def _bind_agent_callbacks(agent):
@@ -309,66 +374,127 @@ def _bind_agent_callbacks(agent):
     agent.on_permission_request = _on_permission_request
 
 
+# LLM / Agent 类，首次使用前由 _load_agent_classes 导入并缓存
+_LLMConfig = None
+_BlenderAgent = None
+_StructuredAgent = None
+
+
+def _load_agent_classes():
+    global _LLMConfig, _BlenderAgent, _StructuredAgent
+    if _LLMConfig is None:
+        from .core.llm import LLMConfig
+        from .core.agent import BlenderAgent
+        from .core.structured_agent import StructuredAgent
+        _BlenderAgent, _StructuredAgent = BlenderAgent, StructuredAgent
+        _LLMConfig = LLMConfig
+
+
+def _warm_imports():
+    """界面就绪后预先导入 LLM 栈，避免首次点击“发送”时在 UI 线程上卡顿"""
+    try:
+        _load_agent_classes()
+    except Exception as e:
+        print(f"[Agent] 预加载 LLM 模块失败: {e}")
+    return None
+
+
+def _evict_agent(agent):
+    for key, cached in list(_agent_key_cache.items()):
+        if cached is agent:
+            del _agent_key_cache[key]
+    close = getattr(agent, "close", None) or getattr(agent, "cancel_current_request", None)
+    if close:
+        try:
+            close()
+        except Exception:
+            pass
+
+
 def get_agent(mode_override: str = ""):
-    global _agents_cache
     prefs = get_preferences()
+    # 以偏好设置的 RNA 指针区分：偏好被重新读取后指针变化，旧条目自然不再命中
+    cache_key = (prefs.as_pointer(), mode_override)
+    agent = _agent_key_cache.get(cache_key, _MISSING)
+    if agent is not _MISSING:
+        return agent
 
     if not prefs.api_key:
         return None
 
     model = prefs.custom_model if prefs.custom_model else prefs.model
     mode = mode_override or prefs.agent_mode
-    config_key = f"{prefs.api_base}|{prefs.api_key}|{model}|{mode}"
+    # 缓存键里只留 API Key 的摘要，不在全局字典中保存明文
+    key_digest = hashlib.blake2b(prefs.api_key.encode("utf-8"), digest_size=16).digest()
+    config_key = (prefs.api_base, model, mode, key_digest)
 
-    if config_key not in _agents_cache:
-        from .core.llm import LLMConfig
+    agent = _agents_cache.get(config_key)
+    if agent is not None:
+        _agents_cache.move_to_end(config_key)
+    else:
+        while len(_agents_cache) >= _AGENT_CACHE_MAX:
+            _evict_agent(_agents_cache.popitem(last=False)[1])
+        if _LLMConfig is None:
+            _load_agent_classes()
 
-        config = LLMConfig(
+        config = _LLMConfig(
             api_base=prefs.api_base,
             api_key=prefs.api_key,
             model=model,
         )
 
         if mode == "structured":
-            from .core.structured_agent import StructuredAgent
-            agent = StructuredAgent(config=config)
+            agent = _StructuredAgent(config=config)
         else:
-            from .core.agent import BlenderAgent
-            agent = BlenderAgent(config=config)
+            agent = _BlenderAgent(config=config)
 
         _bind_agent_callbacks(agent)
         _agents_cache[config_key] = agent
 
-    return _agents_cache.get(config_key)
+    _agent_key_cache[cache_key] = agent
+    return agent
 
 
 def _fallback_mode(mode: str) -> str:
     return "structured" if mode == "native" else "native"
 
 
+def _marker_re(markers):
+    """把关键词元组编译成一个交替正则，一次 search 代替逐个 in 扫描"""
+    return re.compile("|".join(map(re.escape, markers)))
+
+
+_MESHY_MARKERS = ("meshy", "文生3d", "图生3d", "text to 3d", "image to 3d")
+_GENERATION_MARKERS = ("生成", "创建模型", "文生", "图生", "create model", "generate", "to 3d")
+_EDIT_MARKERS = ("材质", "节点", "修改", "优化", "shader", "roughness", "metallic", "ior")
+_SCENE_MARKERS = ("场景", "灯光", "日光", "太阳", "天空", "world", "scene")
+_IMAGE_MARKERS = ("图生", "图片", "参考图", "image", "photo", "根据这张图")
+
+_MESHY_RE = _marker_re(_MESHY_MARKERS)
+_GENERATION_RE = _marker_re(_GENERATION_MARKERS)
+_EDIT_RE = _marker_re(_EDIT_MARKERS)
+_SCENE_RE = _marker_re(_SCENE_MARKERS)
+_IMAGE_RE = _marker_re(_IMAGE_MARKERS)
+_URL_RE = re.compile(r"https?://[^\s)>\]\"']+", re.IGNORECASE)
+
+
 def _infer_route_hint(user_msg: str) -> str:
     lowered = (user_msg or "").strip().lower()
     if not lowered:
         return "常规MCP"
 
-    meshy_markers = ("meshy", "文生3d", "图生3d", "text to 3d", "image to 3d")
-    generation_markers = ("生成", "创建模型", "文生", "图生", "create model", "generate", "to 3d")
-    edit_markers = ("材质", "节点", "修改", "优化", "shader", "roughness", "metallic", "ior")
-    scene_markers = ("场景", "灯光", "日光", "太阳", "天空", "world", "scene")
-
-    if any(k in lowered for k in meshy_markers) and any(k in lowered for k in generation_markers) and not any(
-        k in lowered for k in edit_markers
-    ):
+    is_edit = _EDIT_RE.search(lowered) is not None
+    if not is_edit and _MESHY_RE.search(lowered) and _GENERATION_RE.search(lowered):
         return "Meshy生成"
-    if any(k in lowered for k in edit_markers):
+    if is_edit:
         return "材质编辑"
-    if any(k in lowered for k in scene_markers):
+    if _SCENE_RE.search(lowered):
         return "场景编辑"
     return "常规MCP"
 
 
 def _extract_first_url(text: str) -> str:
-    m = re.search(r"https?://[^\s)>\]\"']+", text or "", flags=re.IGNORECASE)
+    m = _URL_RE.search(text or "")
     return m.group(0) if m else ""
 
 
@@ -378,20 +504,17 @@ def _parse_meshy_request(user_msg: str):
     if not msg:
         return None, None
 
-    meshy_markers = ("meshy", "文生3d", "图生3d", "text to 3d", "image to 3d")
-    generation_markers = ("生成", "创建模型", "文生", "图生", "create model", "generate", "to 3d")
-    image_markers = ("图生", "图片", "参考图", "image", "photo", "根据这张图")
-
-    if not any(k in lowered for k in meshy_markers):
+    if not _MESHY_RE.search(lowered):
         return None, "当前是 Meshy 模式，仅支持文生3D/图生3D。请切换到 Agent 模式执行材质/场景/MCP 操作。"
 
     url = _extract_first_url(msg)
-    if (any(k in lowered for k in image_markers)) and (not url):
+    has_image = _IMAGE_RE.search(lowered) is not None
+    if has_image and not url:
         return None, "检测到图生3D意图，但未提供图片URL。请用“图生3D（导入图片）”按钮上传本地图片。"
-    if url and any(k in lowered for k in image_markers):
+    if url and has_image:
         return ("meshy_image_to_3d", {"image_url": url}), None
 
-    if not any(k in lowered for k in generation_markers):
+    if not _GENERATION_RE.search(lowered):
         return None, "当前是 Meshy 模式，仅支持模型生成请求（文生/图生）。该请求请切到 Agent 模式。"
 
     prompt = msg.replace(url, "").strip() if url else msg
@@ -456,33 +579,60 @@ def _send_message_with_mode(user_msg: str, mode: str):
     return True
 
 
+# last_exec_status → (状态行模板, 图标)
+_STATUS_ROW = {
+    "ok": ("工具执行状态: 正常（模式: {mode}）", "CHECKMARK"),
+    "fallback_running": ("工具执行状态: 回退重试中（模式: {mode}）", "FILE_REFRESH"),
+    "no_toolcall": ("工具执行状态: 未执行工具（模式: {mode}）", "ERROR"),
+    "error": ("工具执行状态: 未执行工具（模式: {mode}）", "ERROR"),
+    "error_after_toolcall": ("工具执行状态: 已执行工具但后续失败（模式: {mode}）", "ERROR"),
+    "processing": ("工具执行状态: 执行中（模式: {mode}）", "SORTTIME"),
+}
+_STATUS_IDLE = ("工具执行状态: 待机", "INFO")
+
+
+# 单槽缓存：(状态键, [(text, icon), ...])；状态未变时绘制不再拼接字符串
+_badge_cache = (None, ())
+
+
+def _health_badge_lines(status, mode, theme, cmode, route, stall, pseudo_hits):
+    tmpl, icon = _STATUS_ROW.get(status, _STATUS_IDLE)
+    lines = [(tmpl.format(mode=mode or "-"), icon)]
+    if status == "processing":
+        lines.append(("提示: AI 可能在继续执行后续步骤，请先等待或点击中止。", "INFO"))
+    if theme is not None:
+        lines.append((f"界面主题: {_THEME_HINTS.get(theme, '跟随 Blender 主题')}", "COLOR"))
+        lines.append((f"对话通道: {'Meshy' if cmode == 'meshy_pipeline' else 'Agent'}", "INFO"))
+    lines.append((f"本轮路由判定: {route or '-'}", "OUTLINER"))
+    lines.append((f"最近卡住原因: {stall or '-'}", "INFO"))
+    if pseudo_hits > 0:
+        lines.append((f"伪调用兜底命中: {pseudo_hits} 次", "INFO"))
+    return tuple(lines)
+
+
 def _draw_health_badge(layout, state: AgentState):
-    status = state.last_exec_status or "idle"
-    mode = state.last_exec_mode or "-"
-    if status == "ok":
-        layout.label(text=f"工具执行状态: 正常（模式: {mode}）", icon="CHECKMARK")
-    elif status == "fallback_running":
-        layout.label(text=f"工具执行状态: 回退重试中（模式: {mode}）", icon="FILE_REFRESH")
-    elif status in ("no_toolcall", "error"):
-        layout.label(text=f"工具执行状态: 未执行工具（模式: {mode}）", icon="ERROR")
-    elif status == "error_after_toolcall":
-        layout.label(text=f"工具执行状态: 已执行工具但后续失败（模式: {mode}）", icon="ERROR")
-    elif status == "processing":
-        layout.label(text=f"工具执行状态: 执行中（模式: {mode}）", icon="SORTTIME")
-        layout.label(text="提示: AI 可能在继续执行后续步骤，请先等待或点击中止。", icon="INFO")
-    else:
-        layout.label(text="工具执行状态: 待机", icon="INFO")
+    global _badge_cache
     try:
         prefs = get_preferences()
-        layout.label(text=f"界面主题: {_theme_hint(prefs)}", icon="COLOR")
+        theme = prefs.ui_theme_preset
         cmode = getattr(prefs, "conversation_mode", "llm_agent")
-        layout.label(text=f"对话通道: {'Meshy' if cmode == 'meshy_pipeline' else 'Agent'}", icon="INFO")
     except Exception:
-        pass
-    layout.label(text=f"本轮路由判定: {state.last_route_hint or '-'}", icon="OUTLINER")
-    layout.label(text=f"最近卡住原因: {state.last_stall_reason or '-'}", icon="INFO")
-    if int(getattr(state, "pseudo_fallback_hits", 0)) > 0:
-        layout.label(text=f"伪调用兜底命中: {int(state.pseudo_fallback_hits)} 次", icon="INFO")
+        theme = cmode = None
+    key = (
+        state.last_exec_status or "idle",
+        state.last_exec_mode,
+        theme,
+        cmode,
+        state.last_route_hint,
+        state.last_stall_reason,
+        state.pseudo_fallback_hits,
+    )
+    cached_key, lines = _badge_cache
+    if key != cached_key:
+        lines = _health_badge_lines(*key)
+        _badge_cache = (key, lines)
+    for text, icon in lines:
+        layout.label(text=text, icon=icon)
 
 
 def _draw_quick_actions(layout, popup: bool = False):
@@ -497,38 +647,33 @@ def _draw_quick_actions(layout, popup: bool = False):
         row.operator("agent.export_performance_report", text="", icon="EXPORT")
 
 
-def _theme_label(prefs) -> str:
-    mapping = {
-        "system": "System",
-        "catppuccin_latte": "Latte",
-        "catppuccin_frappe": "Frappe",
-        "catppuccin_macchiato": "Macchiato",
-        "catppuccin_mocha": "Mocha",
-    }
-    return mapping.get(getattr(prefs, "ui_theme_preset", "system"), "System")
-
-
-def _theme_hint(prefs) -> str:
-    preset = getattr(prefs, "ui_theme_preset", "system")
-    if preset == "system":
-        return "跟随 Blender 主题"
-    return f"Catppuccin · {_theme_label(prefs)} · Soft"
+_THEME_LABELS = {
+    "system": "System",
+    "catppuccin_latte": "Latte",
+    "catppuccin_frappe": "Frappe",
+    "catppuccin_macchiato": "Macchiato",
+    "catppuccin_mocha": "Mocha",
+}
+_THEME_MARKS = {
+    "system": "•",
+    "catppuccin_latte": "☼",
+    "catppuccin_frappe": "◐",
+    "catppuccin_macchiato": "◑",
+    "catppuccin_mocha": "☾",
+}
+# 主题提示文本随预设固定，导入时一次生成，绘制时只查表
+_THEME_HINTS = {
+    preset: "跟随 Blender 主题" if preset == "system" else f"Catppuccin · {label} · Soft"
+    for preset, label in _THEME_LABELS.items()
+}
 
 
 def _theme_mark(prefs) -> str:
-    preset = getattr(prefs, "ui_theme_preset", "system")
-    marks = {
-        "system": "•",
-        "catppuccin_latte": "☼",
-        "catppuccin_frappe": "◐",
-        "catppuccin_macchiato": "◑",
-        "catppuccin_mocha": "☾",
-    }
-    return marks.get(preset, "•")
+    return _THEME_MARKS.get(prefs.ui_theme_preset, "•")
 
 
 def _is_mocha(prefs) -> bool:
-    return getattr(prefs, "ui_theme_preset", "system") == "catppuccin_mocha"
+    return prefs.ui_theme_preset == "catppuccin_mocha"
 
 
 def _section_title(box, title: str, icon: str = "INFO", subtitle: str = ""):
@@ -540,8 +685,8 @@ def _section_title(box, title: str, icon: str = "INFO", subtitle: str = ""):
 
 def _scaled_container(layout, prefs):
     container = layout.column(align=False)
-    if getattr(prefs, "ui_readable_mode", False):
-        container.scale_y = max(1.0, float(getattr(prefs, "ui_scale_factor", 1.2)))
+    if prefs.ui_readable_mode:
+        container.scale_y = max(1.0, prefs.ui_scale_factor)
     return container
 
 
@@ -554,41 +699,208 @@ def _draw_mode_switch(layout, prefs):
         row.label(text="Agent | Meshy（请重载插件）", icon="INFO")
 
 
+def _draw_pending_code(ui, state: AgentState):
+    code_box = ui.box()
+    code_box.label(text="⚠️ 待确认代码:", icon='ERROR')
+    code_box.label(text=state.pending_code_desc)
+    for line in state.pending_code_preview.split("\n"):
+        code_box.label(text=line)
+    if state.pending_code_has_more:
+        code_box.label(text="  ...")
+    row = code_box.row()
+    op_yes = row.operator("agent.confirm_code", text="✅ 执行", icon='CHECKMARK')
+    op_yes.approved = True
+    op_no = row.operator("agent.confirm_code", text="❌ 取消", icon='X')
+    op_no.approved = False
+
+
+def _draw_pending_permission(ui, state: AgentState):
+    perm_box = ui.box()
+    perm_box.label(text="🔐 待确认高权限操作:", icon='LOCKED')
+    perm_box.label(text=f"工具: {state.pending_permission_tool}")
+    perm_box.label(text=f"风险: {state.pending_permission_risk}")
+    perm_box.label(text=state.pending_permission_reason_preview)
+    row = perm_box.row()
+    op_yes = row.operator("agent.confirm_permission", text="✅ 允许一次", icon='CHECKMARK')
+    op_yes.approved = True
+    op_no = row.operator("agent.confirm_permission", text="❌ 拒绝", icon='X')
+    op_no.approved = False
+
+
+def _draw_processing(ui):
+    row = ui.row(align=True)
+    row.label(text="⏳ AI 正在思考...", icon='SORTTIME')
+    row.operator("agent.stop_processing", text="中止", icon='CANCEL')
+
+
+def _draw_input_row(ui, state: AgentState, is_mocha: bool):
+    input_box = ui.box() if is_mocha else ui
+    if is_mocha:
+        _section_title(input_box, "输入", icon="GREASEPENCIL")
+    row = input_box.row(align=True)
+    row.prop(state, "input_text", text="")
+    row.operator("agent.send_message", text="发送", icon='PLAY')
+
+
 def _execute_in_main_thread(func, *args):
     """在 Blender 主线程执行函数"""
-    import queue
-    result_queue = queue.Queue()
+    if threading.current_thread() is threading.main_thread():
+        try:
+            return func(*args)
+        except Exception as e:
+            return {"success": False, "result": None, "error": str(e)}
+
+    done = threading.Event()
+    box = [None]
 
     def do_execute():
         try:
-            result = func(*args) if args else func()
-            result_queue.put(result)
+            box[0] = func(*args)
         except Exception as e:
-            result_queue.put({"success": False, "result": None, "error": str(e)})
+            box[0] = {"success": False, "result": None, "error": str(e)}
+        done.set()
         return None
 
     bpy.app.timers.register(do_execute)
 
-    try:
-        return result_queue.get(timeout=30.0)
-    except Exception:
-        return {"success": False, "result": None, "error": "操作超时（30秒）"}
+    if done.wait(30.0):
+        return box[0]
+    return {"success": False, "result": None, "error": "操作超时（30秒）"}
+
 
 def _get_state() -> AgentState:
     return bpy.context.scene.blender_agent
 
 
-def _add_message(role: str, content: str, is_code: bool = False):
+def _tag_agent_panel_redraw():
+    """只重绘 3D 视图侧边栏（Agent 面板所在区域），不触碰其他编辑器"""
+    wm = bpy.context.window_manager
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type != 'VIEW_3D':
+                continue
+            for region in area.regions:
+                if region.type == 'UI':
+                    region.tag_redraw()
+
+
+_redraw_pending = False
+_REDRAW_INTERVAL = 0.05  # 秒；流式/工具调用高峰期最多约 20 次重绘/秒
+
+
+def _do_redraw():
+    global _redraw_pending
+    _redraw_pending = False
+    try:
+        _tag_agent_panel_redraw()
+    except Exception:
+        pass
+    return None
+
+
+def _schedule_redraw():
+    """合并短时间内的多次重绘请求：连续追加 N 条消息只重绘一次"""
+    global _redraw_pending
+    if _redraw_pending:
+        return
+    _redraw_pending = True
+    bpy.app.timers.register(_do_redraw, first_interval=_REDRAW_INTERVAL)
+
+
+_MESSAGE_WINDOW = 100
+
+_ROLE_ICON = {"user": 'USER', "assistant": 'OUTLINER_OB_LIGHT'}
+# 系统消息按内容标记选图标，按顺序匹配
+_SYS_ICON_TABLE = (
+    ("❌", 'ERROR'),
+    ("错误", 'ERROR'),
+    ("🔧", 'TOOL_SETTINGS'),
+    ("调用工具", 'TOOL_SETTINGS'),
+)
+
+
+# 通过消息总线监听这些 AgentState 属性，变化时才（合并）重绘 Agent 面板
+_MSGBUS_OWNER = object()
+_MSGBUS_PROPS = (
+    "active_message_index",
+    "is_processing",
+    "last_exec_status",
+    "pending_code",
+    "pending_permission_tool",
+)
+
+
+@bpy.app.handlers.persistent
+def _subscribe_msgbus(*_args):
+    """订阅面板相关属性；加载文件会清空订阅，因此在 load_post 中重新订阅"""
+    bpy.msgbus.clear_by_owner(_MSGBUS_OWNER)
+    for prop in _MSGBUS_PROPS:
+        bpy.msgbus.subscribe_rna(
+            key=(AgentState, prop),
+            owner=_MSGBUS_OWNER,
+            args=(),
+            notify=_schedule_redraw,
+        )
+
+
+def _message_icon(role: str, content: str) -> str:
+    icon = _ROLE_ICON.get(role)
+    if icon:
+        return icon
+    for marker, icon in _SYS_ICON_TABLE:
+        if marker in content:
+            return icon
+    return 'INFO'
+
+
+def _fill_message_view(msg, role: str, content: str):
+    msg.preview = content.replace('\n', ' ')[:200]
+    msg.icon = _message_icon(role, content)
+    msg.has_more = len(content) > 100
+
+
+def _refresh_todo_display(todo):
+    type_icon = "🤖" if todo.todo_type == "AGENT" else "👤"
+    strike = "✓ " if todo.done else ""
+    todo.display = f"{type_icon} {strike}{todo.content[:80]}"
+
+
+@bpy.app.handlers.persistent
+def _backfill_message_views(*_args):
+    """旧版本保存的消息/待办没有预计算字段，加载后补齐一次，绘制时不再读取 content"""
+    for scene in bpy.data.scenes:
+        state = getattr(scene, "blender_agent", None)
+        if state is None:
+            continue
+        for msg in state.messages:
+            if not msg.icon:
+                _fill_message_view(msg, msg.role, msg.content)
+        for todo in state.todos:
+            if not todo.display:
+                _refresh_todo_display(todo)
+    return None
+
+
+# 处理中同一回调在 200ms 内重复推送的相同消息直接丢弃
+_echo_filter = EchoFilter(window=0.2)
+
+
+def _add_message(role: str, content: str, is_code: bool = False, dedupe: bool = False):
     state = _get_state()
+    if _echo_filter.should_drop((role, is_code, content), state.is_processing,
+                                dedupe and len(state.messages) > 0):
+        return
+    # 面板只保留最近 _MESSAGE_WINDOW 条，超出时丢弃最早一条，RNA 集合不无限增长
+    if len(state.messages) >= _MESSAGE_WINDOW:
+        state.messages.remove(0)
     msg = state.messages.add()
     msg.role = role
     msg.content = content
     msg.is_code = is_code
+    _fill_message_view(msg, role, content)
+    # 写入 active_message_index 会经消息总线触发重绘
     state.active_message_index = len(state.messages) - 1
 
-    for area in bpy.context.screen.areas:
-        area.tag_redraw()
-
 
 def push_system_notice(content: str):
     """供外部模块（如 Meshy 回调）安全推送系统消息到聊天面板。"""
@@ -598,76 +910,83 @@ def push_system_notice(content: str):
         pass
 
 
-def _schedule_processing_timeout_check(started_at: float, timeout_sec: float = 12.0):
-    """继续执行提示的兜底超时：长时间无后续回调时自动结束等待态。"""
+# 当前唯一有效的继续执行等待 (started_at, deadline)；新的等待直接覆盖旧的
+_continuation_watch = None
 
-    def _check():
-        try:
-            state = _get_state()
-            if not state.is_processing:
-                return None
-            current = float(getattr(state, "continuation_started_at", 0.0) or 0.0)
-            if current <= 0.0 or abs(current - started_at) > 1e-6:
-                return None
-            if (time.time() - started_at) < timeout_sec:
-                return 1.0
-            state.is_processing = False
-            if state.last_exec_status == "processing":
-                state.last_exec_status = "ok" if state.request_had_tool_call else "error"
-            state.continuation_started_at = 0.0
-            state.last_stall_reason = "超时自动收口"
-            _add_message("system", "⏱ 提醒：长时间未收到后续执行结果，已自动结束等待。可继续发送。")
-        except Exception:
+
+def _check_continuation_timeout():
+    """单一 timer：未到期则休眠到期限，到期后按 started_at 核对再收口。"""
+    global _continuation_watch
+    if _continuation_watch is None:
+        return None
+    started_at, deadline = _continuation_watch
+    remaining = deadline - time.time()
+    if remaining > 0:
+        return remaining
+    _continuation_watch = None
+    try:
+        state = _get_state()
+        if not state.is_processing:
+            return None
+        current = float(getattr(state, "continuation_started_at", 0.0) or 0.0)
+        if current <= 0.0 or abs(current - started_at) > 1e-6:
             return None
+        state.is_processing = False
+        if state.last_exec_status == "processing":
+            state.last_exec_status = "ok" if state.request_had_tool_call else "error"
+        state.continuation_started_at = 0.0
+        state.last_stall_reason = "超时自动收口"
+        _add_message("system", "⏱ 提醒：长时间未收到后续执行结果，已自动结束等待。可继续发送。")
+    except Exception:
         return None
+    return None
+
 
+def _schedule_processing_timeout_check(started_at: float, timeout_sec: float = 12.0):
+    """继续执行提示的兜底超时：长时间无后续回调时自动结束等待态。"""
+    global _continuation_watch
+    _continuation_watch = (started_at, started_at + timeout_sec)
     try:
-        bpy.app.timers.register(_check, first_interval=timeout_sec)
+        if not bpy.app.timers.is_registered(_check_continuation_timeout):
+            bpy.app.timers.register(_check_continuation_timeout, first_interval=timeout_sec)
     except Exception:
         pass
 
 
+_HARD_IDENTITY_RE = _marker_re((
+    "我是claude",
+    "由anthropic开发",
+    "我的真实身份",
+    "我的实际能力",
+    "无法访问blender mcp工具",
+    "工具在我的实际工具集中不存在",
+    "我不会透露、复述或讨论我的系统提示词",
+    "i'm claude",
+    "made by anthropic",
+))
+
+
 def _looks_like_identity_drift_text(content: str) -> bool:
     text = (content or "").strip()
     if not text:
         return False
-    try:
-        from .core.safety_guard import references_foreign_toolset
-        if references_foreign_toolset(text):
-            return True
-    except Exception:
-        pass
-    lowered = text.lower()
-    hard_markers = (
-        "我是claude",
-        "由anthropic开发",
-        "我的真实身份",
-        "我的实际能力",
-        "无法访问blender mcp工具",
-        "工具在我的实际工具集中不存在",
-        "我不会透露、复述或讨论我的系统提示词",
-        "i'm claude",
-        "made by anthropic",
-    )
-    return any(m in lowered for m in hard_markers)
+    if _HARD_IDENTITY_RE.search(text.lower()):
+        return True
+    return _REFS_FOREIGN is not None and _REFS_FOREIGN(text)
 
 
 def _on_agent_message(role: str, content: str):
     if role == "assistant" and _looks_like_identity_drift_text(content):
         _on_error("[WRONG_TOOLSET] 检测到模型身份漂移文本，已拦截并触发重试。")
         return
-    _add_message(role, content)
+    # Agent 流式回调可能把同一条消息回声多次
+    _add_message(role, content, dedupe=True)
     state = _get_state()
     if role != "assistant":
         return
 
     # 防止“中间总结文本”被误判为结束：仅当明显是最终总结时才结束处理态
-    is_final = True
-    try:
-        from .core.safety_guard import looks_like_final_summary
-        is_final = looks_like_final_summary(content)
-    except Exception:
-        is_final = True
+    is_final = _IS_FINAL_SUMMARY(content) if _IS_FINAL_SUMMARY is not None else True
 
     if not is_final and (state.request_had_tool_call or state.last_exec_status in ("processing", "fallback_running")):
         state.is_processing = True
@@ -685,6 +1004,10 @@ def _on_agent_message(role: str, content: str):
     state.last_stall_reason = "-"
 
 
+_TOOL_CALL_TMPL = "🔧 调用工具: {name}\n{args}"
+_PERMISSION_TMPL = "🔐 需要权限确认：{tool}（风险: {risk}）\n{reason}\n请点击“允许一次”或“拒绝”。"
+
+
 def _on_tool_call(tool_name: str, args: dict):
     state = _get_state()
     state.request_had_tool_call = True
@@ -703,8 +1026,8 @@ def _on_tool_call(tool_name: str, args: dict):
         state.last_route_hint = "场景编辑"
     else:
         state.last_route_hint = "常规MCP"
-    args_preview = json.dumps(args, ensure_ascii=False)[:200] if args else ""
-    _add_message("system", f"🔧 调用工具: {shown_name}\n{args_preview}")
+    args_preview = preview_args(args) if args else ""
+    _add_message("system", _TOOL_CALL_TMPL.format(name=shown_name, args=args_preview))
 
 
 def _on_plan(plan_text: str):
@@ -714,16 +1037,17 @@ def _on_code_confirm(code: str, description: str, callback):
     state = _get_state()
     state.pending_code = code
     state.pending_code_desc = description
+    # 缩进在此一次拼好，绘制时逐行直接作为 label 文本
+    state.pending_code_preview = "  " + "\n  ".join(
+        line[:120] for line in islice(code[:500].splitlines(), 10)
+    )
+    state.pending_code_has_more = len(code) > 500
     state.is_processing = False
 
-    global _pending_callback
-    _pending_callback = callback
+    _set_pending_callback(callback)
 
     _add_message("system", f"⚠️ 请确认执行以下代码:\n{description}")
 
-    for area in bpy.context.screen.areas:
-        area.tag_redraw()
-
 
 def _on_error(error: str):
     state = _get_state()
@@ -733,7 +1057,7 @@ def _on_error(error: str):
     wrong_toolset_error = ("[WRONG_TOOLSET]" in error)
     can_fallback = (
         (state.last_exec_mode != "meshy")
-        and bool(getattr(prefs, "auto_fallback_on_no_toolcall", True))
+        and prefs.auto_fallback_on_no_toolcall
         and (no_toolcall_error or wrong_toolset_error)
         and (not state.fallback_attempted)
         and bool(state.last_user_message)
@@ -764,21 +1088,44 @@ def _on_error(error: str):
         state.last_stall_reason = "一般错误"
 
 
+# 待授权工具的完整参数留在 Python 侧（按 pending_tool_id 索引），RNA 里只放预览
+_pending_permission_args = {}
+
+
 def _on_permission_request(tool_name: str, args: dict, risk: str, reason: str):
     state = _get_state()
-    state.pending_permission_tool = tool_name or ""
-    state.pending_permission_args = json.dumps(args or {}, ensure_ascii=False)
-    state.pending_permission_risk = risk or "high"
-    state.pending_permission_reason = reason or "该操作需要授权"
+    tool_name = tool_name or ""
+    risk = risk or "high"
+    reason = reason or "该操作需要授权"
+    tool_id = f"perm_{time.time_ns()}"
+    _pending_permission_args.clear()
+    _pending_permission_args[tool_id] = args or {}
+    state.pending_tool_id = tool_id
+    state.pending_permission_tool = tool_name
+    state.pending_permission_args = preview_args(args) if args else ""
+    state.pending_permission_risk = risk
+    state.pending_permission_reason = reason
+    state.pending_permission_reason_preview = reason[:180]
     state.is_processing = False
     state.last_stall_reason = "权限等待"
-    _add_message(
-        "system",
-        f"🔐 需要权限确认：{state.pending_permission_tool}（风险: {state.pending_permission_risk}）\n{state.pending_permission_reason}\n请点击“允许一次”或“拒绝”。",
-    )
+    _add_message("system", _PERMISSION_TMPL.format(tool=tool_name, risk=risk, reason=reason))
+
+
+# 待确认代码的回调（单槽位）。绑定方法以 WeakMethod 保存，不延长 Agent 的生命周期；
+# 回调闭包不应持有 Agent 本身
+_pending_callback_slot = [None]
 
 
-_pending_callback = None
+def _set_pending_callback(callback):
+    _pending_callback_slot[0] = weakref.WeakMethod(callback) if isinstance(callback, MethodType) else callback
+
+
+def _take_pending_callback():
+    """取出并清空槽位；Agent 已被回收时返回 None"""
+    callback, _pending_callback_slot[0] = _pending_callback_slot[0], None
+    if isinstance(callback, weakref.WeakMethod):
+        callback = callback()
+    return callback
 
 
 def _build_performance_report_lines(max_sessions: int = 5) -> list:
@@ -810,36 +1157,51 @@ class AGENT_UL_MessageList(UIList):
     bl_idname = "AGENT_UL_message_list"
 
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
-        if self.layout_type in {'DEFAULT', 'COMPACT'}:
+        lt = self.layout_type
+        if lt == 'DEFAULT' or lt == 'COMPACT':
             row = layout.row(align=True)
 
-            if item.role == "user":
-                row.label(text="", icon='USER')
-            elif item.role == "assistant":
-                row.label(text="", icon='OUTLINER_OB_LIGHT')
-            else:
-                if "❌" in item.content or "错误" in item.content:
-                    row.label(text="", icon='ERROR')
-                elif "🔧" in item.content or "调用工具" in item.content:
-                    row.label(text="", icon='TOOL_SETTINGS')
-                else:
-                    row.label(text="", icon='INFO')
-
-            content_preview = item.content.replace('\n', ' ')[:200]
-            row.label(text=content_preview)
+            row.label(text="", icon=item.icon or 'INFO')
+            row.label(text=item.preview)
 
             op = row.operator("agent.copy_message", text="", icon='COPYDOWN')
             op.index = index
 
-            if len(item.content) > 100:
+            if item.has_more:
                 op2 = row.operator("agent.view_full_message", text="", icon='TEXT')
                 op2.index = index
 
-        elif self.layout_type == 'GRID':
+        elif lt == 'GRID':
             layout.alignment = 'CENTER'
             layout.label(text="", icon='CONSOLE')
 
 
+class AGENT_UL_TodoList(UIList):
+    bl_idname = "AGENT_UL_todo_list"
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        lt = self.layout_type
+        if lt == 'DEFAULT' or lt == 'COMPACT':
+            row = layout.row(align=True)
+
+            op_toggle = row.operator(
+                "agent.toggle_todo", text="", icon="CHECKMARK" if item.done else "CHECKBOX_DEHLT"
+            )
+            op_toggle.index = index
+            row.label(text=item.display)
+
+            if item.todo_type == "AGENT" and not item.done:
+                op_send = row.operator("agent.send_todo_to_agent", text="", icon='PLAY')
+                op_send.index = index
+
+            op_del = row.operator("agent.remove_todo", text="", icon='X')
+            op_del.index = index
+
+        elif lt == 'GRID':
+            layout.alignment = 'CENTER'
+            layout.label(text="", icon='CHECKBOX_DEHLT')
+
+
 # ========== Operators ==========
 
 
@@ -916,16 +1278,18 @@ class AGENT_OT_ConfirmCode(Operator):
     approved: BoolProperty(default=True)
 
     def execute(self, context):
-        global _pending_callback
         state = _get_state()
 
-        if _pending_callback:
-            state.is_processing = True
-            _pending_callback(self.approved)
-            _pending_callback = None
-
-        state.pending_code = ""
-        state.pending_code_desc = ""
+        callback = _take_pending_callback()
+        try:
+            if callback:
+                state.is_processing = True
+                callback(self.approved)
+        finally:
+            state.pending_code = ""
+            state.pending_code_desc = ""
+            state.pending_code_preview = ""
+            state.pending_code_has_more = False
 
         if self.approved:
             _add_message("system", "✅ 代码已执行")
@@ -944,14 +1308,12 @@ class AGENT_OT_ConfirmPermission(Operator):
     def execute(self, context):
         state = _get_state()
         tool_name = state.pending_permission_tool
-        args_text = state.pending_permission_args or "{}"
-        args = {}
-        try:
-            args = json.loads(args_text)
-        except Exception:
-            args = {}
+        args = _pending_permission_args.pop(state.pending_tool_id, None)
 
-        if self.approved and tool_name:
+        if self.approved and tool_name and args is None:
+            # 参数只在本次会话内存中保存；重新加载文件或插件后无法还原
+            _add_message("system", f"⚠️ 授权请求已失效：{tool_name}。请重新发送需求。")
+        elif self.approved and tool_name:
             try:
                 from .permission_guard import approve_tool_once
                 approve_tool_once(tool_name, args)
@@ -984,6 +1346,7 @@ class AGENT_OT_ConfirmPermission(Operator):
                 if agent:
                     state.is_processing = True
                     state.last_exec_status = "processing"
+                    args_text = json.dumps(args, ensure_ascii=False)
                     resume_prompt = (
                         f"权限已批准。请继续完成刚才任务。"
                         f"你对工具 {tool_name} 使用参数 {args_text} 已获得一次性授权，"
@@ -995,8 +1358,10 @@ class AGENT_OT_ConfirmPermission(Operator):
 
         state.pending_permission_tool = ""
         state.pending_permission_args = ""
+        state.pending_tool_id = ""
         state.pending_permission_risk = ""
         state.pending_permission_reason = ""
+        state.pending_permission_reason_preview = ""
         return {"FINISHED"}
 
 
@@ -1037,13 +1402,23 @@ class AGENT_OT_CopyMessage(Operator):
 
     def execute(self, context):
         state = _get_state()
-        messages = list(state.messages)
-        if 0 <= self.index < len(messages):
-            context.window_manager.clipboard = messages[self.index].content
+        if 0 <= self.index < len(state.messages):
+            context.window_manager.clipboard = state.messages[self.index].content
             self.report({'INFO'}, "已复制到剪贴板")
         return {'FINISHED'}
 
 
+def _wrap_lines(text: str, width: int) -> tuple:
+    """按固定宽度切分为显示行（空行显示为空格），弹窗打开时计算一次"""
+    out = []
+    for line in text.split('\n'):
+        if not line:
+            out.append(" ")
+            continue
+        out.extend(line[i:i + width] for i in range(0, len(line), width))
+    return tuple(out)
+
+
 class AGENT_OT_ViewFullMessage(Operator):
     bl_idname = "agent.view_full_message"
     bl_label = "查看完整消息"
@@ -1055,14 +1430,14 @@ class AGENT_OT_ViewFullMessage(Operator):
         return context.window_manager.invoke_props_dialog(self, width=600)
 
     def invoke(self, context, event):
+        self._lines = None
         return context.window_manager.invoke_props_dialog(self, width=600)
 
     def draw(self, context):
         layout = self.layout
         state = _get_state()
-        messages = list(state.messages)
-        if 0 <= self.index < len(messages):
-            msg = messages[self.index]
+        if 0 <= self.index < len(state.messages):
+            msg = state.messages[self.index]
             if msg.role == "user":
                 layout.label(text="👤 你的消息", icon='USER')
             elif msg.role == "assistant":
@@ -1074,12 +1449,11 @@ class AGENT_OT_ViewFullMessage(Operator):
 
             box = layout.box()
             col = box.column(align=True)
-            lines = msg.content.split('\n')
+            lines = getattr(self, "_lines", None)
+            if lines is None:
+                lines = self._lines = _wrap_lines(msg.content, 100)
             for line in lines:
-                while len(line) > 100:
-                    col.label(text=line[:100])
-                    line = line[100:]
-                col.label(text=line if line else " ")
+                col.label(text=line)
 
             layout.separator()
             op = layout.operator("agent.copy_message", text="📋 复制全部内容", icon='COPYDOWN')
@@ -1099,10 +1473,10 @@ class AGENT_OT_AddTodo(Operator):
         item.content = text
         item.todo_type = state.todo_type_input
         item.done = False
+        _refresh_todo_display(item)
         state.todo_input = ""
         state.active_todo_index = len(state.todos) - 1
-        for area in context.screen.areas:
-            area.tag_redraw()
+        _schedule_redraw()
         return {"FINISHED"}
 
 
@@ -1118,8 +1492,7 @@ class AGENT_OT_RemoveTodo(Operator):
             state.todos.remove(self.index)
             if state.active_todo_index >= len(state.todos):
                 state.active_todo_index = max(0, len(state.todos) - 1)
-        for area in context.screen.areas:
-            area.tag_redraw()
+        _schedule_redraw()
         return {"FINISHED"}
 
 
@@ -1132,9 +1505,10 @@ class AGENT_OT_ToggleTodo(Operator):
     def execute(self, context):
         state = _get_state()
         if 0 <= self.index < len(state.todos):
-            state.todos[self.index].done = not state.todos[self.index].done
-        for area in context.screen.areas:
-            area.tag_redraw()
+            todo = state.todos[self.index]
+            todo.done = not todo.done
+            _refresh_todo_display(todo)
+        _schedule_redraw()
         return {"FINISHED"}
 
 
@@ -1268,6 +1642,7 @@ class AGENT_OT_OpenChat(Operator):
         state = _get_state()
         prefs = get_preferences()
         ui = _scaled_container(layout, prefs)
+        is_mocha = _is_mocha(prefs)
 
         mode_kind = getattr(prefs, "conversation_mode", "llm_agent")
         missing_key = (not prefs.api_key) if mode_kind == "llm_agent" else (not getattr(prefs, "meshy_api_key", ""))
@@ -1284,7 +1659,7 @@ class AGENT_OT_OpenChat(Operator):
         _draw_health_badge(header, state)
 
         box = ui.box()
-        _section_title(box, "会话", icon="CONSOLE", subtitle="Soft" if _is_mocha(prefs) else "")
+        _section_title(box, "会话", icon="CONSOLE", subtitle="Soft" if is_mocha else "")
         row = box.row(align=True)
         row.operator("agent.clear_history", text="清空", icon="TRASH")
 
@@ -1299,49 +1674,20 @@ class AGENT_OT_OpenChat(Operator):
             maxrows=12,
         )
         if state.pending_code:
-            code_box = ui.box()
-            code_box.label(text="⚠️ 待确认代码:", icon="ERROR")
-            code_box.label(text=state.pending_code_desc)
-            code_preview = state.pending_code[:500]
-            for line in code_preview.split("\n")[:10]:
-                code_box.label(text=f"  {line}")
-            if len(state.pending_code) > 500:
-                code_box.label(text="  ...")
-            row = code_box.row()
-            op_yes = row.operator("agent.confirm_code", text="✅ 执行", icon="CHECKMARK")
-            op_yes.approved = True
-            op_no = row.operator("agent.confirm_code", text="❌ 取消", icon="X")
-            op_no.approved = False
-
+            _draw_pending_code(ui, state)
         if state.pending_permission_tool:
-            perm_box = ui.box()
-            perm_box.label(text="🔐 待确认高权限操作:", icon="LOCKED")
-            perm_box.label(text=f"工具: {state.pending_permission_tool}")
-            perm_box.label(text=f"风险: {state.pending_permission_risk}")
-            perm_box.label(text=state.pending_permission_reason[:180])
-            row = perm_box.row()
-            op_yes = row.operator("agent.confirm_permission", text="✅ 允许一次", icon="CHECKMARK")
-            op_yes.approved = True
-            op_no = row.operator("agent.confirm_permission", text="❌ 拒绝", icon="X")
-            op_no.approved = False
+            _draw_pending_permission(ui, state)
 
         ui.separator()
 
         if state.is_processing:
-            row = ui.row(align=True)
-            row.label(text="⏳ AI 正在思考...", icon="SORTTIME")
-            row.operator("agent.stop_processing", text="中止", icon="CANCEL")
+            _draw_processing(ui)
         else:
-            input_box = ui.box() if _is_mocha(prefs) else ui
-            if _is_mocha(prefs):
-                _section_title(input_box, "输入", icon="GREASEPENCIL")
-            row = input_box.row(align=True)
-            row.prop(state, "input_text", text="")
-            row.operator("agent.send_message", text="发送", icon="PLAY")
+            _draw_input_row(ui, state, is_mocha)
 
         ui.separator()
-        actions = ui.box() if _is_mocha(prefs) else ui
-        if _is_mocha(prefs):
+        actions = ui.box() if is_mocha else ui
+        if is_mocha:
             _section_title(actions, "操作", icon="TOOL_SETTINGS")
         _draw_quick_actions(actions, popup=True)
         actions.operator("agent.meshy_image_to_3d_upload", text="图生3D（导入图片）", icon="IMAGE_DATA")
@@ -1373,6 +1719,7 @@ class AGENT_PT_MainPanel(Panel):
         state = _get_state()
         prefs = get_preferences()
         ui = _scaled_container(layout, prefs)
+        is_mocha = _is_mocha(prefs)
 
         mode_kind = getattr(prefs, "conversation_mode", "llm_agent")
         missing_key = (not prefs.api_key) if mode_kind == "llm_agent" else (not getattr(prefs, "meshy_api_key", ""))
@@ -1392,7 +1739,7 @@ class AGENT_PT_MainPanel(Panel):
         _draw_health_badge(header, state)
 
         box = ui.box()
-        _section_title(box, "会话", icon='CONSOLE', subtitle="Soft" if _is_mocha(prefs) else "")
+        _section_title(box, "会话", icon='CONSOLE', subtitle="Soft" if is_mocha else "")
         row = box.row(align=True)
         row.operator("agent.clear_history", text="清空", icon='TRASH')
 
@@ -1407,46 +1754,17 @@ class AGENT_PT_MainPanel(Panel):
             maxrows=15,
         )
         if state.is_processing:
-            row = ui.row(align=True)
-            row.label(text="⏳ AI 正在思考...", icon='SORTTIME')
-            row.operator("agent.stop_processing", text="中止", icon='CANCEL')
+            _draw_processing(ui)
         else:
-            input_box = ui.box() if _is_mocha(prefs) else ui
-            if _is_mocha(prefs):
-                _section_title(input_box, "输入", icon="GREASEPENCIL")
-            row = input_box.row(align=True)
-            row.prop(state, "input_text", text="")
-            row.operator("agent.send_message", text="发送", icon='PLAY')
+            _draw_input_row(ui, state, is_mocha)
 
         if state.pending_code:
-            code_box = ui.box()
-            code_box.label(text="⚠️ 待确认代码:", icon='ERROR')
-            code_box.label(text=state.pending_code_desc)
-            code_preview = state.pending_code[:500]
-            for line in code_preview.split("\n")[:10]:
-                code_box.label(text=f"  {line}")
-            if len(state.pending_code) > 500:
-                code_box.label(text="  ...")
-            row = code_box.row()
-            op_yes = row.operator("agent.confirm_code", text="✅ 执行", icon='CHECKMARK')
-            op_yes.approved = True
-            op_no = row.operator("agent.confirm_code", text="❌ 取消", icon='X')
-            op_no.approved = False
-
+            _draw_pending_code(ui, state)
         if state.pending_permission_tool:
-            perm_box = ui.box()
-            perm_box.label(text="🔐 待确认高权限操作:", icon='LOCKED')
-            perm_box.label(text=f"工具: {state.pending_permission_tool}")
-            perm_box.label(text=f"风险: {state.pending_permission_risk}")
-            perm_box.label(text=state.pending_permission_reason[:180])
-            row = perm_box.row()
-            op_yes = row.operator("agent.confirm_permission", text="✅ 允许一次", icon='CHECKMARK')
-            op_yes.approved = True
-            op_no = row.operator("agent.confirm_permission", text="❌ 拒绝", icon='X')
-            op_no.approved = False
-
-        actions = ui.box() if _is_mocha(prefs) else ui
-        if _is_mocha(prefs):
+            _draw_pending_permission(ui, state)
+
+        actions = ui.box() if is_mocha else ui
+        if is_mocha:
             _section_title(actions, "操作", icon="TOOL_SETTINGS")
         _draw_quick_actions(actions, popup=False)
         actions.operator("agent.meshy_image_to_3d_upload", text="图生3D（导入图片）", icon="IMAGE_DATA")
@@ -1472,6 +1790,71 @@ class AGENT_OT_ViewPerformanceReport(Operator):
             col.label(text=line if line else " ")
 
 
+_CSV_HEADER = (
+    "session_id", "user_request", "metric_events",
+    "prewarm_hit_rate", "search_success_rate", "avg_estimated_output_tokens",
+)
+
+
+_EMPTY: dict = {}  # 只读共享空字典，避免每行新建 {}
+
+
+def _csv_row(log: dict) -> tuple:
+    summary = log.get("performance_summary") or _EMPTY
+    attach = summary.get("shader_context_attach") or _EMPTY
+    search = summary.get("shader_search_index_result") or _EMPTY
+    plan = summary.get("shader_read_plan") or _EMPTY
+    return (
+        log.get("session_id", ""),
+        (log.get("user_request", "") or "")[:120],
+        summary.get("metric_events", 0),
+        attach.get("prewarm_hit_rate", 0),
+        search.get("success_rate", 0),
+        plan.get("avg_estimated_output_tokens", 0),
+    )
+
+
+def _write_performance_report(out_path: str, export_format: str, pretty_json: bool, logs):
+    if export_format == "json":
+        indent = 2 if pretty_json else None
+        # 逐条写出，不在内存中拼装完整报告
+        with open(out_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.write("[\n")
+            for i, log in enumerate(logs):
+                entry = json.dumps({
+                    "session_id": log.get("session_id"),
+                    "user_request": log.get("user_request"),
+                    "performance_brief": log.get("performance_brief"),
+                    "performance_summary": log.get("performance_summary", {}),
+                }, ensure_ascii=False, indent=indent)
+                if indent:
+                    entry = "  " + entry.replace("\n", "\n  ")
+                f.write(",\n" + entry if i else entry)
+            f.write("\n]\n")
+    else:
+        import csv
+
+        with open(out_path, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(_CSV_HEADER)
+            writer.writerows(_csv_row(log) for log in logs)
+
+
+def _export_report_worker(out_path: str, export_format: str, pretty_json: bool, logs):
+    """后台线程：写出报告，完成后通过 timer 在主线程追加一条系统消息"""
+    try:
+        _write_performance_report(out_path, export_format, pretty_json, logs)
+        text = f"📄 性能报告已导出: {out_path}"
+    except Exception as e:
+        text = f"❌ 性能报告导出失败: {e}"
+
+    def _notify():
+        _add_message("system", text)
+        return None
+
+    bpy.app.timers.register(_notify, first_interval=0.0)
+
+
 class AGENT_OT_ExportPerformanceReport(Operator):
     bl_idname = "agent.export_performance_report"
     bl_label = "导出性能报告"
@@ -1479,12 +1862,14 @@ class AGENT_OT_ExportPerformanceReport(Operator):
 
     export_format: EnumProperty(
         name="格式",
-        items=[
-            ("json", "JSON", "导出完整 JSON 报告"),
-            ("csv", "CSV", "导出简化 CSV 报告"),
-        ],
+        items=_EXPORT_FORMAT_ITEMS,
         default="json",
     )
+    pretty_json: BoolProperty(
+        name="格式化 JSON",
+        description="缩进排版（体积约翻倍、导出更慢）；默认每条记录一行",
+        default=False,
+    )
 
     def invoke(self, context, event):
         return context.window_manager.invoke_props_dialog(self, width=380)
@@ -1492,52 +1877,32 @@ class AGENT_OT_ExportPerformanceReport(Operator):
     def draw(self, context):
         layout = self.layout
         layout.prop(self, "export_format")
+        if self.export_format == "json":
+            layout.prop(self, "pretty_json")
         layout.label(text="文件将导出到插件 logs 目录", icon='INFO')
 
     def execute(self, context):
         try:
             from . import action_log
 
-            logs = action_log.get_recent_logs(20)
-            if not logs:
+            it = action_log.iter_recent_logs(20)
+            first = next(it, None)
+            if first is None:
                 self.report({'WARNING'}, "暂无性能日志可导出")
                 return {'CANCELLED'}
-
-            log_dir = os.path.join(os.path.dirname(__file__), "logs")
-            os.makedirs(log_dir, exist_ok=True)
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-            if self.export_format == "json":
-                out_path = os.path.join(log_dir, f"performance_report_{ts}.json")
-                payload = []
-                for log in logs:
-                    payload.append({
-                        "session_id": log.get("session_id"),
-                        "user_request": log.get("user_request"),
-                        "performance_brief": log.get("performance_brief"),
-                        "performance_summary": log.get("performance_summary", {}),
-                    })
-                with open(out_path, "w", encoding="utf-8") as f:
-                    json.dump(payload, f, ensure_ascii=False, indent=2)
-            else:
-                out_path = os.path.join(log_dir, f"performance_report_{ts}.csv")
-                header = "session_id,user_request,metric_events,prewarm_hit_rate,search_success_rate,avg_estimated_output_tokens\n"
-                rows = [header]
-                for log in logs:
-                    summary = log.get("performance_summary", {}) or {}
-                    attach = summary.get("shader_context_attach", {}) or {}
-                    search = summary.get("shader_search_index_result", {}) or {}
-                    plan = summary.get("shader_read_plan", {}) or {}
-                    request = (log.get("user_request", "") or "").replace('"', "'").replace("\n", " ")[:120]
-                    rows.append(
-                        f"\"{log.get('session_id', '')}\",\"{request}\",{summary.get('metric_events', 0)},"
-                        f"{attach.get('prewarm_hit_rate', 0)},{search.get('success_rate', 0)},"
-                        f"{plan.get('avg_estimated_output_tokens', 0)}\n"
-                    )
-                with open(out_path, "w", encoding="utf-8") as f:
-                    f.writelines(rows)
-
-            self.report({'INFO'}, f"已导出: {out_path}")
+            logs = chain((first,), it)
+
+            log_dir = action_log.get_log_dir()
+            ts = time.strftime("%Y%m%d_%H%M%S")
+            out_path = os.path.join(log_dir, f"performance_report_{ts}.{self.export_format}")
+
+            # 读取剩余日志与写文件都在后台线程完成（不触碰 bpy 数据），结果回主线程提示
+            threading.Thread(
+                target=_export_report_worker,
+                args=(out_path, self.export_format, self.pretty_json, logs),
+                daemon=True,
+            ).start()
+            self.report({'INFO'}, "导出中...")
             return {'FINISHED'}
         except Exception as e:
             self.report({'ERROR'}, f"导出失败: {e}")
@@ -1556,23 +1921,16 @@ class AGENT_PT_TodoPanel(Panel):
         layout = self.layout
         state = _get_state()
 
-        for i, todo in enumerate(state.todos):
-            row = layout.row(align=True)
-            icon = "CHECKMARK" if todo.done else "CHECKBOX_DEHLT"
-            op_toggle = row.operator("agent.toggle_todo", text="", icon=icon)
-            op_toggle.index = i
-
-            type_icon = "🤖" if todo.todo_type == "AGENT" else "👤"
-            strike = "✓ " if todo.done else ""
-            row.label(text=f"{type_icon} {strike}{todo.content[:80]}")
-
-            if todo.todo_type == "AGENT" and not todo.done:
-                op_send = row.operator("agent.send_todo_to_agent", text="", icon='PLAY')
-                op_send.index = i
-
-            op_del = row.operator("agent.remove_todo", text="", icon='X')
-            op_del.index = i
-
+        layout.template_list(
+            "AGENT_UL_todo_list",
+            "todos",
+            state,
+            "todos",
+            state,
+            "active_todo_index",
+            rows=6,
+            maxrows=20,
+        )
         if len(state.todos) == 0:
             layout.label(text="暂无待办事项", icon='INFO')
 
@@ -1590,6 +1948,7 @@ classes = [
     TodoItem,
     AgentState,
     AGENT_UL_MessageList,
+    AGENT_UL_TodoList,
     AGENT_OT_SendMessage,
     AGENT_OT_StopProcessing,
     AGENT_OT_ConfirmCode,
@@ -1611,18 +1970,42 @@ classes = [
 ]
 
 
+_register_classes, _unregister_classes = bpy.utils.register_classes_factory(classes)
+
+
 def register():
-    for cls in classes:
-        bpy.utils.register_class(cls)
+    _agent_key_cache.clear()
+    _register_classes()
 
     bpy.types.Scene.blender_agent = bpy.props.PointerProperty(type=AgentState)
+    if _invalidate_preferences_cache not in bpy.app.handlers.load_factory_preferences_post:
+        bpy.app.handlers.load_factory_preferences_post.append(_invalidate_preferences_cache)
+    for handler in (_backfill_message_views, _subscribe_msgbus):
+        if handler not in bpy.app.handlers.load_post:
+            bpy.app.handlers.load_post.append(handler)
+    _subscribe_msgbus()
+    bpy.app.timers.register(_backfill_message_views, first_interval=0.0)
+    bpy.app.timers.register(_warm_imports, first_interval=0.5)
 
 
 def unregister():
-    global _agents_cache
-    _agents_cache = {}
-
-    for cls in reversed(classes):
-        bpy.utils.unregister_class(cls)
-
+    global _redraw_pending, _continuation_watch
+    for timer in (_do_redraw, _warm_imports, _check_continuation_timeout):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    _redraw_pending = False
+    _continuation_watch = None
+    _agents_cache.clear()
+    _agent_key_cache.clear()
+    _pending_callback_slot[0] = None
+    _pending_permission_args.clear()
+    if _invalidate_preferences_cache in bpy.app.handlers.load_factory_preferences_post:
+        bpy.app.handlers.load_factory_preferences_post.remove(_invalidate_preferences_cache)
+    for handler in (_backfill_message_views, _subscribe_msgbus):
+        if handler in bpy.app.handlers.load_post:
+            bpy.app.handlers.load_post.remove(handler)
+    bpy.msgbus.clear_by_owner(_MSGBUS_OWNER)
+
+    # 先删除指向 AgentState 的 PointerProperty，再注销类，避免悬空的 RNA 引用
     del bpy.types.Scene.blender_agent
+    _unregister_classes()
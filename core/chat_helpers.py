@@ -0,0 +1,44 @@
+"""
+聊天面板的纯逻辑辅助（不依赖 bpy）
+"""
+import time
+
+
+class EchoFilter:
+    """识别处理中由同一生产者重复推送的相同消息（流式回调的回声）
+
+    只有调用方声明可去重、处于处理态且处理态未切换时，窗口内与上一条完全相同的消息才丢弃；
+    其余消息（重复的工具调用行、重复报告的错误等）一律保留。
+    """
+
+    def __init__(self, window: float = 0.2):
+        self.window = window
+        self._last_key = None
+        self._last_ts = 0.0
+
+    def reset(self):
+        self._last_key = None
+        self._last_ts = 0.0
+
+    def should_drop(self, key, processing: bool, dedupe: bool = False, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        key = (key, processing)
+        if dedupe and processing and key == self._last_key and now - self._last_ts < self.window:
+            return True
+        self._last_key, self._last_ts = key, now
+        return False
+
+
+def preview_args(args: dict, limit: int = 200) -> str:
+    """工具参数的有界预览：逐项截断，累计超过 limit 即停止，不序列化整个参数"""
+    parts = []
+    total = 0
+    for k, v in args.items():
+        if isinstance(v, (str, bytes)):
+            v = v[:40]
+        part = f"{k}={repr(v)[:40]}"
+        parts.append(part)
+        total += len(part) + 2
+        if total > limit:
+            break
+    return ", ".join(parts)[:limit]
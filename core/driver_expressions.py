@@ -0,0 +1,90 @@
+"""
+驱动表达式的纯文本处理（不依赖 bpy）
+"""
+import ast
+import builtins
+import math
+import re
+
+
+_NUM = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+# "frame * k" / "k * frame" / "b + frame * k"
+_LINEAR_EXPR_RE = re.compile(
+    rf"^\s*(?:(?P<base>{_NUM})\s*\+\s*)?"
+    rf"(?:frame\s*\*\s*(?P<k1>{_NUM})|(?P<k2>{_NUM})\s*\*\s*frame)\s*$"
+)
+
+
+def parse_linear_expression(expression: str):
+    """识别线性表达式，返回 (base, speed)；非线性返回 None"""
+    m = _LINEAR_EXPR_RE.match(expression or "")
+    if not m:
+        return None
+    base = float(m.group("base") or 0.0)
+    speed = float(m.group("k1") or m.group("k2"))
+    return base, speed
+
+
+# 驱动模板：展开为线性（走 Generator）或 Blender 原生简单表达式，均无逐帧 Python 开销
+# 数值用 repr 写入（最短往返表示）、不留空白，减小表达式体积
+# 名称 → (参数名, 默认值, 表达式构造函数)
+_DRIVER_TEMPLATES = {
+    "linear": (("k", "base"), (0.01, 0.0),
+               lambda k, base: f"{float(base)!r}+frame*{float(k)!r}"),
+    "sine": (("amp", "freq", "phase", "offset"), (1.0, 0.1, 0.0, 0.0),
+             lambda amp, freq, phase, offset:
+                 f"{float(offset)!r}+{float(amp)!r}*sin(frame*{float(freq)!r}+{float(phase)!r})"),
+    "pulse": (("period", "duty"), (24.0, 0.5),
+              lambda period, duty:
+                  f"1.0 if fmod(frame,{float(period)!r})<{float(period) * float(duty)!r} else 0.0"),
+    "sawtooth": (("period",), (24.0,),
+                 lambda period: f"fmod(frame,{float(period)!r})/{float(period)!r}"),
+}
+
+
+def expand_driver_template(template: str, params) -> str:
+    spec = _DRIVER_TEMPLATES.get(template)
+    if spec is None:
+        raise ValueError(f"未知模板: {template}，可用: {', '.join(_DRIVER_TEMPLATES)}")
+    names, defaults, build = spec
+    params = list(params or [])
+    if len(params) > len(names):
+        raise ValueError(f"模板 {template} 最多 {len(names)} 个参数: {', '.join(names)}")
+    return build(*(params + list(defaults[len(params):])))
+
+
+# Blender 默认 driver_namespace 中的名字：内置函数、math 模块、bpy、noise 及 bl_math 的 clamp/lerp/smoothstep
+_DEFAULT_DRIVER_NAMES = frozenset(
+    {n for n in dir(builtins) if not n.startswith("_")}
+    | {n for n in dir(math) if not n.startswith("_")}
+    | {"frame", "bpy", "noise", "clamp", "lerp", "smoothstep"}
+)
+
+
+def uses_default_driver_names(expression: str) -> bool:
+    """表达式是否只引用 Blender 默认驱动命名空间中的名字（未启用本插件时也能求值）"""
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        return False
+    return all(node.id in _DEFAULT_DRIVER_NAMES for node in ast.walk(tree) if isinstance(node, ast.Name))
+
+
+def check_vectorized_expression(expression: str, allowed_names) -> None:
+    """校验表达式可在整段帧数组上一次求值，不满足时抛 ValueError
+
+    只允许 allowed_names 中的名字；条件表达式、and/or/not 与属性访问（如 bpy.*）
+    在数组上没有逐帧语义，一律拒绝。
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"表达式语法错误: {expression} ({e.msg})") from None
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.IfExp, ast.BoolOp)) or (
+                isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not)):
+            raise ValueError("烘焙不支持条件表达式和 and/or/not，请改用 anim_add_value_driver")
+        if isinstance(node, ast.Attribute):
+            raise ValueError("烘焙不支持属性访问（如 bpy.*、noise.*），请改用 anim_add_value_driver")
+        if isinstance(node, ast.Name) and node.id not in allowed_names:
+            raise ValueError(f"烘焙不支持的名字: {node.id}，可用: {', '.join(sorted(allowed_names))}")
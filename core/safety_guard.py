@@ -40,6 +40,8 @@ _FOREIGN_TOOLSET_STRONG_MARKERS = [
     "those tool definitions aren't real tools i have access to",
     "not actually available to me in this environment",
 ]
+# 强标记合成一个交替正则，一次扫描代替逐个子串查找
+_FOREIGN_TOOLSET_STRONG_RE = re.compile("|".join(map(re.escape, _FOREIGN_TOOLSET_STRONG_MARKERS)))
 
 _FOREIGN_TOOLSET_WEAK_MARKERS = [
     "bash_tool",
@@ -90,7 +92,7 @@ def references_foreign_toolset(text: str) -> bool:
     if not text:
         return False
     lowered = text.lower()
-    if any(marker in lowered for marker in _FOREIGN_TOOLSET_STRONG_MARKERS):
+    if _FOREIGN_TOOLSET_STRONG_RE.search(lowered):
         return True
     weak_hits = 0
     for marker in _FOREIGN_TOOLSET_WEAK_MARKERS:
@@ -507,25 +507,34 @@ class StructuredAgent:
         """在 Blender 主线程执行"""
         try:
             import bpy
-            import queue
-            result_queue = queue.Queue()
+        except Exception:
+            # bpy 不可用时直接调用
+            return func(*args)
 
-            def do_execute():
-                try:
-                    result = func(*args)
-                    result_queue.put(result)
-                except Exception as e:
-                    _log(f"Main thread error: {e}")
-                    result_queue.put({"success": False, "result": None, "error": str(e)})
-                return None
+        if threading.current_thread() is threading.main_thread():
+            # 已在主线程：直接执行，避免等待自己注册的 timer 而卡死
+            try:
+                return func(*args)
+            except Exception as e:
+                _log(f"Main thread error: {e}")
+                return {"success": False, "result": None, "error": str(e)}
+
+        done = threading.Event()
+        box = [None]
 
-            bpy.app.timers.register(do_execute)
+        def do_execute():
             try:
-                return result_queue.get(timeout=30.0)
-            except Exception:
-                return {"success": False, "result": None, "error": "操作超时（30秒）"}
-        except Exception:
-            return func(*args)
+                box[0] = func(*args)
+            except Exception as e:
+                _log(f"Main thread error: {e}")
+                box[0] = {"success": False, "result": None, "error": str(e)}
+            done.set()
+            return None
+
+        bpy.app.timers.register(do_execute)
+        if done.wait(30.0):
+            return box[0]
+        return {"success": False, "result": None, "error": "操作超时（30秒）"}
 
     def _fire_callback(self, callback, *args):
         """非阻塞 UI 回调"""
@@ -22,16 +22,17 @@ class AnthropicProvider(LLMProvider):
         system: str = "",
         tools: list[dict] | None = None,
         tool_choice: str = "auto",
+        tools_payload: bytes | None = None,
     ) -> LLMResponse:
         url = self._build_url()
-        payload = self._build_payload(messages, system, tools, tool_choice)
+        payload = self._build_payload(messages, system, tools, tool_choice, tools_payload)
         headers = {
             "Content-Type": "application/json",
             "x-api-key": self.config.api_key,
             "anthropic-version": "2023-06-01",
         }
 
-        data = json.dumps(payload).encode("utf-8")
+        data = self._encode_payload(payload, tools_payload if tools else None)
         raw = self._request_with_retry(url, data, headers)
         return self._parse_response(raw)
 
@@ -70,7 +71,7 @@ class AnthropicProvider(LLMProvider):
             return f"{base}/messages"
         return f"{base}/v1/messages"
 
-    def _build_payload(self, messages, system, tools, tool_choice) -> dict:
+    def _build_payload(self, messages, system, tools, tool_choice, tools_payload=None) -> dict:
         payload = {
             "model": self.config.model,
             "max_tokens": self.config.max_tokens,
@@ -79,7 +80,8 @@ class AnthropicProvider(LLMProvider):
         if system:
             payload["system"] = system
         if tools:
-            payload["tools"] = self._convert_tools(tools)
+            if tools_payload is None:
+                payload["tools"] = self._convert_tools(tools)
             tc_map = {"auto": {"type": "auto"}, "any": {"type": "any"}, "none": {"type": "none"}}
             payload["tool_choice"] = tc_map.get(tool_choice, {"type": "auto"})
         return payload
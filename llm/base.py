@@ -81,6 +81,7 @@ class LLMProvider(ABC):
         system: str = "",
         tools: list[dict] | None = None,
         tool_choice: str = "auto",
+        tools_payload: bytes | None = None,
     ) -> LLMResponse:
         """
         发送对话请求
@@ -90,12 +91,35 @@ class LLMProvider(ABC):
             system: system prompt（独立传递，不混入 messages）
             tools: 工具定义列表（Provider 自行转换格式）
             tool_choice: "auto" | "any" | "none"
+            tools_payload: encode_tools() 预编码的工具 JSON，提供时跳过每轮的转换与序列化
 
         Returns:
             LLMResponse
         """
         ...
 
+    def encode_tools(self, tools: list[dict]) -> bytes:
+        """
+        预编码工具定义（Provider 格式的紧凑 JSON）
+
+        工具 schema 在多轮工具循环中不变，编码一次后通过 chat(tools_payload=...) 复用。
+        """
+        return json.dumps(
+            self._convert_tools(tools), ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+
+    def _convert_tools(self, tools: list[dict]) -> list[dict]:
+        """转换为 Provider 特定的工具格式（默认原样返回）"""
+        return tools
+
+    @staticmethod
+    def _encode_payload(payload: dict, tools_payload: bytes | None = None) -> bytes:
+        """序列化请求体；tools_payload 直接拼接为 "tools" 字段，不再重复编码"""
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if tools_payload:
+            data = data[:-1] + b',"tools":' + tools_payload + b"}"
+        return data
+
     @abstractmethod
     def format_tool_result(self, tool_call_id: str, result: str, is_error: bool = False) -> dict:
         """
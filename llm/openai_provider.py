@@ -23,15 +23,16 @@ class OpenAIProvider(LLMProvider):
         system: str = "",
         tools: list[dict] | None = None,
         tool_choice: str = "auto",
+        tools_payload: bytes | None = None,
     ) -> LLMResponse:
         url = self._build_url()
-        payload = self._build_payload(messages, system, tools, tool_choice)
+        payload = self._build_payload(messages, system, tools, tool_choice, tools_payload)
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.config.api_key}",
         }
 
-        data = json.dumps(payload).encode("utf-8")
+        data = self._encode_payload(payload, tools_payload if tools else None)
         raw = self._request_with_retry(url, data, headers)
         return self._parse_response(raw)
 
@@ -74,7 +75,7 @@ class OpenAIProvider(LLMProvider):
             return f"{base}/chat/completions"
         return f"{base}/v1/chat/completions"
 
-    def _build_payload(self, messages, system, tools, tool_choice) -> dict:
+    def _build_payload(self, messages, system, tools, tool_choice, tools_payload=None) -> dict:
         # OpenAI 把 system 放在 messages 里
         final_messages = []
         if system:
@@ -96,7 +97,8 @@ class OpenAIProvider(LLMProvider):
         }
 
         if tools:
-            payload["tools"] = self._convert_tools(tools)
+            if tools_payload is None:
+                payload["tools"] = self._convert_tools(tools)
             if tool_choice == "none":
                 payload["tool_choice"] = "none"
             elif tool_choice == "any":
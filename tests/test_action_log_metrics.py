@@ -1,4 +1,6 @@
+import os
 import pathlib
+import shutil
 import tempfile
 import unittest
 
@@ -41,5 +43,39 @@ class TestActionLogMetrics(unittest.TestCase):
                 action_log._current_session = old_session
 
 
+    def test_log_dir_recreated_after_deletion(self):
+        with tempfile.TemporaryDirectory() as td:
+            log_dir = pathlib.Path(td) / "logs"
+            old_dir = action_log._LOG_DIR
+            old_metrics = action_log._METRICS_FILE
+            old_session = action_log._current_session
+            old_ready = action_log._log_dir_ready
+            try:
+                action_log._LOG_DIR = str(log_dir)
+                action_log._METRICS_FILE = str(log_dir / "metrics.jsonl")
+                action_log._current_session = None
+                action_log._log_dir_ready = False
+
+                action_log.start_session("test request")
+                action_log.log_metric("first", {"success": True})
+                self.assertTrue(action_log._log_dir_ready)
+                shutil.rmtree(log_dir)
+
+                action_log.log_metric("second", {"success": True})
+                records = action_log.get_recent_metrics(10)
+                self.assertEqual([r["metric_name"] for r in records], ["second"])
+
+                shutil.rmtree(log_dir)
+                filepath = action_log.end_session("done")
+                self.assertTrue(os.path.exists(filepath))
+
+                shutil.rmtree(log_dir)
+                self.assertEqual(action_log.get_recent_logs(), [])
+            finally:
+                action_log._LOG_DIR = old_dir
+                action_log._METRICS_FILE = old_metrics
+                action_log._current_session = old_session
+                action_log._log_dir_ready = old_ready
+
 if __name__ == "__main__":
     unittest.main()
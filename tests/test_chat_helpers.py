@@ -0,0 +1,74 @@
+import unittest
+
+from core.chat_helpers import EchoFilter, preview_args
+
+
+class TestEchoFilter(unittest.TestCase):
+    def setUp(self):
+        self.filter = EchoFilter(window=0.2)
+        self.tool_line = ("system", False, "🔧 调用工具: shader_set_value\nvalue=1")
+
+    def test_echo_while_processing_dropped(self):
+        key = ("assistant", False, "正在处理…")
+        self.assertFalse(self.filter.should_drop(key, True, dedupe=True, now=1.0))
+        self.assertTrue(self.filter.should_drop(key, True, dedupe=True, now=1.1))
+
+    def test_repeated_tool_lines_survive(self):
+        for i in range(3):
+            self.assertFalse(self.filter.should_drop(self.tool_line, True, now=1.0 + i * 0.01))
+
+    def test_repeated_error_survives_when_idle(self):
+        key = ("system", False, "❌ 错误: timeout")
+        self.assertFalse(self.filter.should_drop(key, False, dedupe=True, now=1.0))
+        self.assertFalse(self.filter.should_drop(key, False, dedupe=True, now=1.05))
+
+    def test_outside_window_survives(self):
+        key = ("assistant", False, "完成")
+        self.assertFalse(self.filter.should_drop(key, True, dedupe=True, now=1.0))
+        self.assertFalse(self.filter.should_drop(key, True, dedupe=True, now=1.3))
+
+    def test_processing_toggle_survives(self):
+        key = ("assistant", False, "完成")
+        self.assertFalse(self.filter.should_drop(key, False, dedupe=True, now=1.0))
+        self.assertFalse(self.filter.should_drop(key, True, dedupe=True, now=1.05))
+
+    def test_only_consecutive_repeats_dropped(self):
+        a = ("assistant", False, "A")
+        b = ("assistant", False, "B")
+        self.assertFalse(self.filter.should_drop(a, True, dedupe=True, now=1.0))
+        self.assertFalse(self.filter.should_drop(b, True, dedupe=True, now=1.01))
+        self.assertFalse(self.filter.should_drop(a, True, dedupe=True, now=1.02))
+
+    def test_code_flag_distinguishes(self):
+        self.assertFalse(self.filter.should_drop(("assistant", False, "x"), True, dedupe=True, now=1.0))
+        self.assertFalse(self.filter.should_drop(("assistant", True, "x"), True, dedupe=True, now=1.01))
+
+
+class TestPreviewArgs(unittest.TestCase):
+    def test_short_args_unchanged(self):
+        self.assertEqual(preview_args({"name": "Cube", "level": 2}), "name='Cube', level=2")
+        self.assertEqual(preview_args({}), "")
+
+    def test_long_value_truncated_per_item(self):
+        out = preview_args({"code": "x" * 500, "level": 2})
+        self.assertEqual(out, "code=" + repr("x" * 40)[:40] + ", level=2")
+
+    def test_non_string_value_truncated_per_item(self):
+        out = preview_args({"values": list(range(100))})
+        self.assertEqual(out, "values=" + repr(list(range(100)))[:40])
+
+    def test_total_limit_stops_early(self):
+        args = {f"key_{i}": "v" * 30 for i in range(50)}
+        out = preview_args(args)
+        self.assertLessEqual(len(out), 200)
+        self.assertIn("key_0=", out)
+        self.assertNotIn("key_10=", out)
+
+    def test_custom_limit(self):
+        out = preview_args({"a": "x" * 30, "b": "y" * 30}, limit=20)
+        self.assertEqual(len(out), 20)
+        self.assertTrue(out.startswith("a='xxx"))
+
+
+if __name__ == "__main__":
+    unittest.main()
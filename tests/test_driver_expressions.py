@@ -0,0 +1,86 @@
+import unittest
+
+from core.driver_expressions import (
+    check_vectorized_expression,
+    expand_driver_template,
+    parse_linear_expression,
+    uses_default_driver_names,
+)
+
+
+class TestLinearExpression(unittest.TestCase):
+    def test_valid_forms(self):
+        self.assertEqual(parse_linear_expression("frame*0.1"), (0.0, 0.1))
+        self.assertEqual(parse_linear_expression("0.5 * frame"), (0.0, 0.5))
+        self.assertEqual(parse_linear_expression(" 2 + frame * -0.25 "), (2.0, -0.25))
+        self.assertEqual(parse_linear_expression("-1.5+frame*1e-2"), (-1.5, 0.01))
+        self.assertEqual(parse_linear_expression(".5+3*frame"), (0.5, 3.0))
+
+    def test_invalid_forms(self):
+        for expr in ("", None, "frame", "sin(frame)", "frame*frame", "frame*0.1+2",
+                     "2 - frame*0.1", "frame/10", "frame*0.1 # x", "frames*0.1"):
+            with self.subTest(expr=expr):
+                self.assertIsNone(parse_linear_expression(expr))
+
+
+class TestDriverTemplate(unittest.TestCase):
+    def test_defaults_and_params(self):
+        self.assertEqual(expand_driver_template("linear", []), "0.0+frame*0.01")
+        self.assertEqual(expand_driver_template("linear", [0.5, 2]), "2.0+frame*0.5")
+        self.assertEqual(expand_driver_template("sine", [2]), "0.0+2.0*sin(frame*0.1+0.0)")
+        self.assertEqual(expand_driver_template("pulse", [10]), "1.0 if fmod(frame,10.0)<5.0 else 0.0")
+        self.assertEqual(expand_driver_template("sawtooth", None), "fmod(frame,24.0)/24.0")
+
+    def test_linear_template_parses_as_linear(self):
+        self.assertEqual(parse_linear_expression(expand_driver_template("linear", [0.25, -1])), (-1.0, 0.25))
+
+    def test_invalid_template(self):
+        with self.assertRaises(ValueError):
+            expand_driver_template("square", [])
+        with self.assertRaises(ValueError):
+            expand_driver_template("linear", [1, 2, 3])
+
+
+class TestTemplateNumberFormat(unittest.TestCase):
+    def test_numbers_written_with_repr(self):
+        k = 0.1 + 0.2
+        self.assertEqual(expand_driver_template("linear", [k]), f"0.0+frame*{k!r}")
+        self.assertEqual(parse_linear_expression(expand_driver_template("linear", [k, 1e-7])), (1e-7, k))
+
+    def test_no_whitespace(self):
+        for template, params in (("linear", [0.5, 1]), ("sine", [1, 0.2, 0.3, 0.4]), ("sawtooth", [12])):
+            with self.subTest(template=template):
+                self.assertNotIn(" ", expand_driver_template(template, params))
+
+
+class TestDefaultDriverNames(unittest.TestCase):
+    def test_default_names(self):
+        for expr in ("sin(frame*0.1)", "1.0 if fmod(frame,24)<12 else 0.0", "noise.random()*abs(frame)",
+                     "bpy.context.scene.frame_current*0.5", "clamp(lerp(0,1,frame/100),0,1)", "max(0, log(frame+1))"):
+            with self.subTest(expr=expr):
+                self.assertTrue(uses_default_driver_names(expr))
+
+    def test_custom_names(self):
+        for expr in ("my_wave(frame)", "frame*speed", "_drv_0123(frame)", "sin(", ""):
+            with self.subTest(expr=expr):
+                self.assertFalse(uses_default_driver_names(expr))
+
+
+class TestVectorizedExpression(unittest.TestCase):
+    names = frozenset({"frame", "sin", "fmod", "pi"})
+
+    def test_arithmetic_accepted(self):
+        for expr in ("0.5+0.5*sin(frame*0.1)", "fmod(frame,24)/24", "-frame**2*pi", "(frame>10)*1.0"):
+            with self.subTest(expr=expr):
+                check_vectorized_expression(expr, self.names)
+
+    def test_unsupported_rejected(self):
+        for expr in ("1.0 if frame>10 else 0.0", "frame>1 and frame<5", "not frame",
+                     "noise.random()", "bpy.context.scene.frame_current", "cos(frame)", "sin(", "__import__('os')"):
+            with self.subTest(expr=expr):
+                with self.assertRaises(ValueError):
+                    check_vectorized_expression(expr, self.names)
+
+
+if __name__ == "__main__":
+    unittest.main()
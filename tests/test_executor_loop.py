@@ -0,0 +1,136 @@
+import importlib
+import pathlib
+import sys
+import types
+import unittest
+from unittest import mock
+
+
+def _load_executor_module():
+    repo_root = pathlib.Path(__file__).resolve().parents[1]
+
+    # 构造可相对导入的顶层包环境（不经过依赖 bpy 的插件 __init__），导入后还原 sys.modules
+    pkg = types.ModuleType("gohot_agent")
+    pkg.__path__ = [str(repo_root)]
+    with mock.patch.dict(sys.modules, {"gohot_agent": pkg}):
+        return importlib.import_module("gohot_agent.agents.executor")
+
+
+class TestCompactHistory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mod = _load_executor_module()
+
+    def setUp(self):
+        self.head = [{"role": "user", "content": "给 Cube 加材质"}]
+        self.messages = list(self.head)
+        self.rounds = []
+        self.all_results = []
+
+    def _add_round(self, i, success=True):
+        self.rounds.append((len(self.messages), len(self.all_results)))
+        self.messages.append({"role": "assistant", "content": f"call-{i}"})
+        self.messages.append({"role": "user", "content": f"result-{i}"})
+        result = {"success": success, "result": {"name": f"Node.{i:03d}"}, "error": None if success else "boom"}
+        self.all_results.append({"tool": f"tool_{i}", "result": result})
+
+    def _compact(self):
+        self.rounds = self.mod._compact_history(self.messages, self.head, self.rounds, self.all_results)
+
+    def test_recent_rounds_untouched(self):
+        for i in range(self.mod._KEEP_RECENT_ROUNDS):
+            self._add_round(i)
+        before = list(self.messages)
+        self._compact()
+        self.assertEqual(self.messages, before)
+        self.assertEqual(self.rounds, [(1, 0), (3, 1)])
+
+    def test_compacts_from_third_round(self):
+        for i in range(3):
+            self._add_round(i)
+        tail = self.messages[3:]
+        self._compact()
+
+        self.assertEqual(self.messages[1:], tail)
+        self.assertEqual(self.rounds, [(1, 1), (3, 2)])
+        for msg_idx, result_idx in self.rounds:
+            self.assertEqual(self.messages[msg_idx]["content"], f"call-{result_idx}")
+
+        merged = self.messages[0]
+        self.assertEqual(merged["role"], "user")
+        self.assertTrue(merged["content"].startswith("给 Cube 加材质\n\n[前序工具结果已汇总: 1 次调用，全部 success]"))
+        # 较早的工具结果保留预览，模型仍能拿到节点名等信息
+        self.assertIn("- tool_0: ", merged["content"])
+        self.assertIn("Node.000", merged["content"])
+        self.assertEqual(self.head[0]["content"], "给 Cube 加材质")
+
+    def test_roles_alternate_after_compaction(self):
+        for i in range(4):
+            self._add_round(i)
+            self._compact()
+        roles = [m["role"] for m in self.messages]
+        self.assertEqual(roles, ["user", "assistant", "user", "assistant", "user"])
+
+    def test_repeated_compaction_rebuilds_summary(self):
+        for i in range(4):
+            self._add_round(i, success=(i != 1))
+            self._compact()
+        content = self.messages[0]["content"]
+        self.assertEqual(content.count("给 Cube 加材质"), 1)
+        self.assertEqual(content.count("[前序工具结果已汇总"), 1)
+        self.assertIn("[前序工具结果已汇总: 2 次调用，1 次失败]", content)
+        self.assertIn("- tool_1: FAIL: boom", content)
+        self.assertNotIn("tool_2", content)
+
+    def test_content_blocks_get_text_block(self):
+        self.head = [{"role": "user", "content": [{"type": "text", "text": "req"}]}]
+        self.messages = list(self.head)
+        for i in range(3):
+            self._add_round(i)
+        self._compact()
+        blocks = self.messages[0]["content"]
+        self.assertEqual(blocks[0], {"type": "text", "text": "req"})
+        self.assertEqual(blocks[1]["type"], "text")
+        self.assertTrue(blocks[1]["text"].startswith("[前序工具结果已汇总: 1 次调用"))
+
+    def test_non_user_head_untouched(self):
+        self.head = [{"role": "assistant", "content": "x"}]
+        self.messages = list(self.head)
+        for i in range(3):
+            self._add_round(i)
+        before = list(self.messages)
+        self._compact()
+        self.assertEqual(self.messages, before)
+
+
+class TestFinalTextReply(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.is_final = staticmethod(_load_executor_module()._is_final_text_reply)
+
+    def setUp(self):
+        self.summary = "已为 Cube 添加细分修改器，视图级别设为 2，渲染级别设为 3，操作完成。"
+
+    def test_answer_intent_accepted(self):
+        self.assertTrue(self.is_final("Cube 在原点。", "query", "simple", False))
+        self.assertTrue(self.is_final("这是节点树的说明。", "explain", "complex", False))
+
+    def test_empty_text_rejected(self):
+        self.assertFalse(self.is_final("", "query", "simple", True))
+
+    def test_action_without_tool_results_rejected(self):
+        self.assertFalse(self.is_final("好的，我现在就去为场景添加一个立方体并设置材质颜色。", "create", "simple", False))
+
+    def test_action_with_tool_results_accepted(self):
+        self.assertTrue(self.is_final(self.summary, "modify", "simple", True))
+
+    def test_complex_action_rejected(self):
+        self.assertFalse(self.is_final(self.summary, "modify", "complex", True))
+
+    def test_short_or_script_text_rejected(self):
+        self.assertFalse(self.is_final("完成", "modify", "simple", True))
+        self.assertFalse(self.is_final("import bpy\nbpy.ops.mesh.primitive_cube_add()", "modify", "simple", True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import json
+import unittest
+
+from llm.base import LLMProvider
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class TestEncodePayload(unittest.TestCase):
+    def setUp(self):
+        self.payload = {
+            "model": "test-model",
+            "messages": [{"role": "user", "content": "给立方体加一个\"金属\"材质\n"}],
+            "max_tokens": 1024,
+            "stream": False,
+        }
+        self.tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": "shader_create_material",
+                    "description": "创建材质",
+                    "parameters": {"type": "object", "properties": {"name": {"type": "string"}}},
+                },
+            }
+        ]
+
+    def test_without_tools_matches_dumps(self):
+        self.assertEqual(LLMProvider._encode_payload(self.payload), _dumps(self.payload))
+        self.assertEqual(LLMProvider._encode_payload(self.payload, None), _dumps(self.payload))
+
+    def test_spliced_tools_round_trip(self):
+        data = LLMProvider._encode_payload(self.payload, _dumps(self.tools))
+        full = dict(self.payload, tools=self.tools)
+        self.assertEqual(json.loads(data), full)
+        self.assertEqual(data, _dumps(full))
+
+    def test_payload_not_mutated(self):
+        before = json.loads(_dumps(self.payload))
+        LLMProvider._encode_payload(self.payload, _dumps(self.tools))
+        self.assertEqual(self.payload, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
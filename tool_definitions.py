@@ -616,7 +616,7 @@ TOOLS = [
     },
     {
         "name": "anim_add_uv_scroll",
-        "description": "为材质的 Mapping 节点添加 UV 滚动动画（基于 Driver，无需脚本）。可分别设置 X/Y/Z 轴的滚动速度。",
+        "description": "为材质的 Mapping 节点添加 UV 滚动动画（Generator 曲线原生求值，无需脚本）。可分别设置 X/Y/Z 轴的滚动速度。",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -624,7 +624,8 @@ TOOLS = [
                 "node_name": {"type": "string", "description": "Mapping 节点名称"},
                 "speed_x": {"type": "number", "description": "X轴滚动速度（每帧偏移量，默认0）"},
                 "speed_y": {"type": "number", "description": "Y轴滚动速度（每帧偏移量，默认0）"},
-                "speed_z": {"type": "number", "description": "Z轴滚动速度（每帧偏移量，默认0）"}
+                "speed_z": {"type": "number", "description": "Z轴滚动速度（每帧偏移量，默认0）"},
+                "verbose": {"type": "boolean", "description": "是否返回调整提示（批量调用可设为 false，默认 true）"}
             },
             "required": ["material_name", "node_name"]
         }
@@ -638,7 +639,8 @@ TOOLS = [
                 "material_name": {"type": "string", "description": "材质名称"},
                 "node_name": {"type": "string", "description": "Mapping 节点名称"},
                 "speed": {"type": "number", "description": "旋转速度（弧度/帧，默认0.01）"},
-                "axis": {"type": "string", "enum": ["X", "Y", "Z"], "description": "旋转轴（默认Z）"}
+                "axis": {"type": "string", "enum": ["X", "Y", "Z"], "description": "旋转轴（默认Z）"},
+                "verbose": {"type": "boolean", "description": "是否返回调整提示（批量调用可设为 false，默认 true）"}
             },
             "required": ["material_name", "node_name"]
         }
@@ -654,7 +656,8 @@ TOOLS = [
                 "speed_x": {"type": "number", "description": "X轴缩放速度（每帧变化量）"},
                 "speed_y": {"type": "number", "description": "Y轴缩放速度"},
                 "speed_z": {"type": "number", "description": "Z轴缩放速度"},
-                "base_scale": {"type": "number", "description": "初始缩放值（默认1.0）"}
+                "base_scale": {"type": "number", "description": "初始缩放值（默认1.0）"},
+                "verbose": {"type": "boolean", "description": "是否返回调整提示（批量调用可设为 false，默认 true）"}
             },
             "required": ["material_name", "node_name"]
         }
@@ -674,9 +677,25 @@ TOOLS = [
             "required": ["material_name", "node_name", "input_name", "expression"]
         }
     },
+    {
+        "name": "anim_add_template_driver",
+        "description": "用预置模板为节点输入添加驱动动画（原生求值，比自由表达式更快）。模板: linear(k, base), sine(amp, freq, phase, offset), pulse(period, duty), sawtooth(period)",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "material_name": {"type": "string", "description": "材质名称"},
+                "node_name": {"type": "string", "description": "节点名称"},
+                "input_name": {"type": "string", "description": "输入名称"},
+                "template": {"type": "string", "enum": ["linear", "sine", "pulse", "sawtooth"], "description": "模板名（默认 linear）"},
+                "params": {"type": "array", "items": {"type": "number"}, "description": "模板参数，按顺序，未给出的使用默认值"},
+                "index": {"type": "integer", "description": "向量/颜色的分量索引（-1表示标量，默认-1）"}
+            },
+            "required": ["material_name", "node_name", "input_name", "template"]
+        }
+    },
     {
         "name": "anim_add_keyframe",
-        "description": "为节点输入在指定帧插入关键帧",
+        "description": "为节点输入在指定帧插入关键帧（单帧）。一次插入多帧请用 anim_add_keyframes",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -690,9 +709,48 @@ TOOLS = [
             "required": ["material_name", "node_name", "input_name", "frame", "value"]
         }
     },
+    {
+        "name": "anim_add_keyframes",
+        "description": "为节点输入批量插入关键帧（一次写入，比多次调用 anim_add_keyframe 快得多）。适合烘焙、密集关键帧动画。",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "material_name": {"type": "string", "description": "材质名称"},
+                "node_name": {"type": "string", "description": "节点名称"},
+                "input_name": {"type": "string", "description": "输入名称"},
+                "frames": {"type": "array", "items": {"type": "number"}, "description": "帧号列表"},
+                "values": {
+                    "type": "array",
+                    "items": {"anyOf": [{"type": "number"}, {"type": "array", "items": {"type": "number"}}]},
+                    "description": "与 frames 等长的值列表（数字，或向量/颜色数组）",
+                },
+                "index": {"type": "integer", "description": "向量分量索引（values 为数字时使用，-1表示标量，默认-1）"},
+                "interpolation": {"type": "string", "enum": ["CONSTANT", "LINEAR", "BEZIER"], "description": "新关键帧的插值方式（默认使用 Blender 设置）"}
+            },
+            "required": ["material_name", "node_name", "input_name", "frames", "values"]
+        }
+    },
+    {
+        "name": "anim_bake_expression",
+        "description": "把 frame 的算术表达式在帧区间上一次性求值并烘焙为关键帧（会移除该输入的 Driver）。适合固定帧范围的正弦/脉动等非线性动画，渲染时无逐帧表达式开销。只支持算术运算与数学函数，不支持条件表达式、and/or/not、noise 与 bpy（这些请用 anim_add_value_driver）",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "material_name": {"type": "string", "description": "材质名称"},
+                "node_name": {"type": "string", "description": "节点名称"},
+                "input_name": {"type": "string", "description": "输入名称"},
+                "expression": {"type": "string", "description": "表达式，变量 frame，可用 sin/cos/tan/sqrt/exp/log/pow/abs/fmod/floor/ceil/round/min/max/clamp/pi 等，如 0.5+0.5*sin(frame*0.1)"},
+                "frame_start": {"type": "integer", "description": "起始帧（默认1）"},
+                "frame_end": {"type": "integer", "description": "结束帧（默认250）"},
+                "index": {"type": "integer", "description": "向量/颜色的分量索引（-1表示标量或全部分量，默认-1）"},
+                "interpolation": {"type": "string", "enum": ["CONSTANT", "LINEAR", "BEZIER"], "description": "关键帧插值方式（默认使用 Blender 偏好设置）"}
+            },
+            "required": ["material_name", "node_name", "input_name", "expression"]
+        }
+    },
     {
         "name": "anim_remove_driver",
-        "description": "移除节点输入上的 Driver 动画",
+        "description": "移除节点输入上的 Driver 动画（含 UV 动画工具创建的 Generator 曲线）",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -1867,7 +1925,9 @@ def _complete_todo(index: int) -> dict:
     try:
         state = bpy.context.scene.blender_agent
         if 0 <= index < len(state.todos):
+            from . import chat_ui
             state.todos[index].done = True
+            chat_ui._refresh_todo_display(state.todos[index])
             content = state.todos[index].content
             return {"success": True, "result": f"已完成: {content}", "error": None}
         return {"success": False, "result": None, "error": f"无效索引: {index}"}
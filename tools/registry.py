@@ -50,7 +50,9 @@ TOOL_GROUPS = {
     ],
     "animation": [
         "anim_add_uv_scroll", "anim_add_uv_rotate", "anim_add_uv_scale",
-        "anim_add_value_driver", "anim_add_keyframe", "anim_remove_driver",
+        "anim_add_value_driver", "anim_add_template_driver",
+        "anim_add_keyframe", "anim_add_keyframes", "anim_bake_expression",
+        "anim_remove_driver",
     ],
     "render": [
         "setup_render", "render_image",